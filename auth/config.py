@@ -1,4 +1,5 @@
 
+from auth.models import VerificationKey
 from utils.models import ConfigModel
 
 
@@ -7,8 +8,16 @@ class _AuthConfig(ConfigModel):
   #JWT
   JWT_ALGORITHM: str
   JWT_SECRET_KEY: str
+  JWT_SECRET_KEY_FILE: str | None = None
+  JWT_KEY_ID: str = "main"
+  JWT_VERIFICATION_KEYS: list[VerificationKey] = []
   ACCESS_TOKEN_EXPIRE_MINUTES: int
   REFRESH_TOKEN_EXPIRE_HOURS: int
+  DECODED_TOKEN_CACHE_SIZE: int = 10_000
+
+  #Password hashing
+  PASSWORD_HASH_POOL_SIZE: int = 2
+  PASSWORD_HASH_QUEUE_DEPTH: int = 64
 
   #Verification
   VERIFICATION_TOKEN_EXPIRE_DAYS: int
@@ -4,9 +4,10 @@ from fastapi.security import OAuth2PasswordBearer, SecurityScopes
 from jwt import ExpiredSignatureError
 
 from auth.models import AccessToken, AccessTokenData
-from auth.utils import create_access_token, decode_token, get_roles_from
+from auth.utils import create_access_token, decode_token_cached, get_roles_from, get_roles_mask_from
 from db.connection import AsyncSessionDepends
 from roles.models import AvailableRoles
+from roles.utils import has_roles, mask_to_roles, required_mask, roles_to_mask
 from users.models import UserWithRoles
 from users.repository import UsersRepository
 
@@ -52,36 +53,33 @@ async def get_current_user(
     )
 
   try:
-    payload = decode_token(token)
+    payload = decode_token_cached(token)
     user_id = payload.get("user_id")
 
     if user_id is None:
       raise credentials_exception
 
-    token_roles = get_roles_from(payload)
-
-    token_data = AccessTokenData(user_id=user_id, roles=token_roles)
+    roles_mask = get_roles_mask_from(payload)
+    required_roles_mask = required_mask(tuple(security_scopes.scopes))
 
   except ExpiredSignatureError:
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Access token expired")
   except Exception:
     raise credentials_exception
 
-  assert token_data.user_id is not None
-  user = await UsersRepository.get_user(session, user_id=token_data.user_id)
+  user = await UsersRepository.get_cached_user(session, user_id)
 
   if user is None:
     raise credentials_exception
 
-  for scope in security_scopes.scopes:
-    if scope not in token_data.roles:
-      raise HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Not enough permissions",
-        headers={"WWW-Authenticate": authenticate_value},
-      )
+  if not has_roles(roles_mask, required_roles_mask):
+    raise HTTPException(
+      status_code=status.HTTP_401_UNAUTHORIZED,
+      detail="Not enough permissions",
+      headers={"WWW-Authenticate": authenticate_value},
+    )
 
-  return UserWithRoles(user=user, roles=token_data.roles)
+  return UserWithRoles(user=user, roles=list(mask_to_roles(roles_mask)))
 
 
 def renew_access_token(token: Annotated[str, Depends(oauth2_scheme)]) -> AccessToken:
@@ -93,7 +91,7 @@ def renew_access_token(token: Annotated[str, Depends(oauth2_scheme)]) -> AccessT
     )
 
   try:
-    payload = decode_token(token)
+    payload = decode_token_cached(token)
 
     user_id = payload.get("user_id")
 
@@ -106,6 +104,8 @@ def renew_access_token(token: Annotated[str, Depends(oauth2_scheme)]) -> AccessT
       raise credentials_exception
 
     token_roles = get_roles_from(payload)
+    # Unknown role names of legacy tokens are rejected, not dropped from the new token
+    roles_to_mask(token_roles, strict=True)
 
     new_access_token_data = AccessTokenData(user_id=user_id, roles=token_roles)
     new_access_token = create_access_token(new_access_token_data.model_dump())
@@ -121,5 +121,15 @@ def is_admin(user: UserWithRoles) -> bool:
   return AvailableRoles.ADMIN in user.roles
 
 
-AdminDependency = Security(get_current_user, scopes=[AvailableRoles.ADMIN])
-ValidUserDependency = Security(get_current_user, scopes=[])
\ No newline at end of file
+def roles_security(*roles: str):
+  """
+  `Security` dependency requiring all *roles*. Their bitmask is computed here,
+  so unknown roles fail on import and requests only look it up
+  """
+  required_mask(roles)
+
+  return Security(get_current_user, scopes=list(roles))
+
+
+AdminDependency = roles_security(AvailableRoles.ADMIN)
+ValidUserDependency = roles_security()
\ No newline at end of file
@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+from typing import Any
+
+import jwt
+from jwt.algorithms import HMACAlgorithm
+
+from auth.config import AuthConfig
+
+
+@dataclass(frozen=True)
+class JWTKey:
+  kid: str
+  algorithm: str
+  verifying_key: Any
+  signing_key: Any | None = None
+
+
+  @property
+  def is_symmetric(self) -> bool:
+    return isinstance(jwt.get_algorithm_by_name(self.algorithm), HMACAlgorithm)
+
+
+  @staticmethod
+  def parse(kid: str, algorithm: str, key: str | bytes, is_private: bool = False) -> "JWTKey":
+    """
+    Parses key material once, so PyJWT does not parse PEM/secret on every encode/decode
+    """
+    if algorithm == "none":
+      raise ValueError("unsigned JWT algorithm is not allowed")
+
+    prepared = jwt.get_algorithm_by_name(algorithm).prepare_key(key)
+
+    if not is_private:
+      return JWTKey(kid=kid, algorithm=algorithm, verifying_key=prepared)
+
+    verifying_key = prepared if isinstance(prepared, bytes) else prepared.public_key()
+
+    return JWTKey(kid=kid, algorithm=algorithm, verifying_key=verifying_key, signing_key=prepared)
+
+
+class _KeyRing:
+  """
+  :param signing_key: active key, it signs new tokens and stamps its `kid` to the header
+
+  :param verification_keys: other keys still accepted for verification (i.e. during rotation)
+
+  Tokens without `kid` (issued before key ring) are verified with the active key
+  """
+  def __init__(self, signing_key: JWTKey, verification_keys: list[JWTKey] | None = None) -> None:
+    if signing_key.signing_key is None:
+      raise ValueError(f"key {signing_key.kid} can not sign tokens")
+
+    self.signing_key = signing_key
+    self.keys: dict[str, JWTKey] = {key.kid: key for key in verification_keys or []}
+    self.keys[signing_key.kid] = signing_key
+
+
+  @staticmethod
+  def from_config() -> "_KeyRing":
+    secret = AuthConfig.JWT_SECRET_KEY
+
+    if AuthConfig.JWT_SECRET_KEY_FILE:
+      with open(AuthConfig.JWT_SECRET_KEY_FILE) as f:
+        secret = f.read()
+
+    signing_key = JWTKey.parse(AuthConfig.JWT_KEY_ID, AuthConfig.JWT_ALGORITHM, secret, is_private=True)
+
+    verification_keys = [
+      JWTKey.parse(key.kid, key.algorithm, key.key) for key in AuthConfig.JWT_VERIFICATION_KEYS
+    ]
+
+    return _KeyRing(signing_key, verification_keys)
+
+
+  def encode(self, payload: dict[str, Any]) -> str:
+    key = self.signing_key
+
+    return jwt.encode(payload, key.signing_key, algorithm=key.algorithm, headers={"kid": key.kid})
+
+
+  def decode(self, token: str) -> dict[str, Any]:
+    kid = jwt.get_unverified_header(token).get("kid")
+
+    key = self.signing_key if kid is None else self.keys.get(kid)
+
+    if key is None:
+      raise jwt.InvalidTokenError(f"unknown key id {kid}")
+
+    return jwt.decode(token, key.verifying_key, algorithms=[key.algorithm])
+
+
+  def jwks(self) -> dict[str, list[dict[str, Any]]]:
+    """
+    Public keys as JWKS document, so other services can verify tokens locally.
+    Symmetric keys are never published
+    """
+    keys = []
+
+    for key in self.keys.values():
+      if key.is_symmetric:
+        continue
+
+      jwk = jwt.get_algorithm_by_name(key.algorithm).to_jwk(key.verifying_key, as_dict=True)
+      keys.append({**jwk, "kid": key.kid, "alg": key.algorithm, "use": "sig"})
+
+    return {"keys": keys}
+
+
+KeyRing = _KeyRing.from_config()
@@ -1,6 +1,8 @@
 
 from pydantic import BaseModel, field_serializer
 
+from roles.utils import roles_to_mask
+
 
 class AccessToken(BaseModel):
   access_token: str
@@ -21,9 +23,25 @@ class AccessTokenData(BaseModel):
   roles: list[str] = []
 
   @field_serializer("roles")
-  def serialize_roles(self, roles: list[str]) -> str:
-    return ' '.join(roles)
+  def serialize_roles(self, roles: list[str]) -> int:
+    """
+    Roles are stored in token as bitmask of `AvailableRoles` to keep tokens small
+    """    
+    return roles_to_mask(roles)
 
 
 class RefreshTokenData(AccessTokenData):
-  is_refresh: bool = False
\ No newline at end of file
+  is_refresh: bool = False
+
+
+class VerificationKey(BaseModel):
+  """
+  Key that is only used to verify tokens, i.e. previous signing key during rotation
+
+  - **kid**: key id from token header
+  - **algorithm**: JWT algorithm (HS256, ES256, EdDSA, ...)
+  - **key**: HMAC secret or PEM encoded public key
+  """
+  kid: str
+  algorithm: str
+  key: str
\ No newline at end of file
@@ -1,68 +1,47 @@
 from typing import Annotated
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.config import AuthConfig
 from auth.dependencies import renew_access_token
-from auth.models import AccessToken, Tokens
-from auth.utils import create_access_token, create_refresh_token, generate_verification_link, verify_password
+from auth.keyring import KeyRing
+from auth.models import AccessToken, AccessTokenData, Tokens
+from auth.utils import create_access_token, create_refresh_token, verify_password_async
 from auth.verification.models import VerificationToken
-from auth.verification.repository import VerificationRepository
 from db.connection import AsyncSessionDepends
-from users.models import RegisterUser, OKResponce, User, UserLogin
+from users.models import RegisterUser, OKResponce, UserCredentials, UserLogin
 from users.repository import  UsersRepository
-from users_roles.repository import UsersRolesRepository
-from utils.utils import pretty_print
 
 
 auth_router = APIRouter(prefix="/auth", tags=["auth"])
 
 
-async def authenticate_user(session: AsyncSession, user: UserLogin) -> User | None:
-  user_credential = await UsersRepository.get_user(session, email=user.email)
+async def authenticate_user(session: AsyncSession, user: UserLogin) -> UserCredentials | None:
+  user_credential = await UsersRepository.get_credentials(session, email=user.email)
   
   if not user_credential:
     return None
   
-  if not verify_password(user.password, user_credential.password):
+  if not await verify_password_async(user.password, user_credential.password):
     return None
 
   return user_credential
 
 
-async def get_user_roles(session: AsyncSession, user_id: int) -> str:
+async def get_user_roles(session: AsyncSession, user_id: int) -> list[str]:
   """
   Gets user roles from DB by *user_id*
 
-  :returns: string that joined with space (i.e. "user admin superadmin")
+  :returns: list of role names (i.e. ["user", "admin"])
   
   """  
-  roles = await UsersRolesRepository.get_roles_by(session, user_id)
+  credentials = await UsersRepository.get_credentials(session, user_id=user_id)
   
-  if not roles:
-    return ""
+  if credentials is None:
+    return []
   
-  return " ".join([role.role for role in roles])
-
-
-async def send_verification_link(session: AsyncSession, user_id: int, req: Request):
-  """
-  For simplicity i make verification url printed to the console
-  
-  Ideally it should send a html generated responce
-  """  
-  v_token = await VerificationRepository.add(session, user_id)
-
-  if v_token is None:
-    raise HTTPException(detail=f"some errors occured", status_code=status.HTTP_400_BAD_REQUEST)
-
-  base_url = str(req.base_url).rstrip('/')
-  verification_link = generate_verification_link(base_url, v_token.token)
-
-  pretty_print("VERIFICATION LINK ->", verification_link, sep_cnt=30)
-
-  return verification_link
+  return credentials.roles
 
 
 @auth_router.post("/signup", 
@@ -89,7 +68,6 @@ async def send_verification_link(session: AsyncSession, user_id: int, req: Reque
 )
 async def signup(
   user: RegisterUser, 
-  background_tasks: BackgroundTasks, 
   req: Request, 
   session: AsyncSessionDepends
 ) -> OKResponce:
@@ -102,15 +80,16 @@ async def signup(
     - **last_name**: string | None
   """
   
-  result = await UsersRepository.create_user(session, user)
+  base_url = str(req.base_url).rstrip('/')
+
+  result = await UsersRepository.signup_user(session, user, base_url)
 
   if result is None:
     raise HTTPException(detail=f"user {user.email} already exists", status_code=status.HTTP_400_BAD_REQUEST)
 
-  background_tasks.add_task(send_verification_link, session, result.user_id, req)
-  background_tasks.add_task(UsersRolesRepository.add_default_user_role, session, result.user_id)
+  new_user, _ = result
 
-  return result
+  return new_user
 
 
 @auth_router.post(f"/{AuthConfig.VERIFICATION_ENDPOINT_PATH}",
@@ -144,21 +123,11 @@ async def signup(
 )
 async def verify(token: VerificationToken, session: AsyncSessionDepends) -> OKResponce:
   """
-    Verifies user by given verification token
+    Verifies user by given verification token, token can be used only once
     
     - **token**: string
   """
-  verification = await VerificationRepository.get(session, token.token)
-
-  if verification is None:
-    raise HTTPException(detail=f"token invalid or expired", status_code=status.HTTP_403_FORBIDDEN)
-
-  result = await UsersRepository.verify_user(session, verification.user_id)
-
-  if result is None:
-    raise HTTPException(detail=f"user already verified", status_code=status.HTTP_400_BAD_REQUEST)
-
-  return result
+  return await UsersRepository.verify_user_by_token(session, token.token)
 
 
 @auth_router.post("/login",
@@ -194,9 +163,7 @@ async def login(user: UserLogin, session: AsyncSessionDepends) -> Tokens:
   if not user_credentials:
     raise HTTPException(detail=f"invalid user credentials", status_code=status.HTTP_401_UNAUTHORIZED)
 
-  user_roles = await get_user_roles(session, user_credentials.user_id)
-
-  data = {"user_id": user_credentials.user_id, "roles": user_roles}
+  data = AccessTokenData(user_id=user_credentials.user_id, roles=user_credentials.roles).model_dump()
   
   access_token = create_access_token(data)
   refresh_token = create_refresh_token(data)
@@ -245,5 +212,24 @@ async def login(user: UserLogin, session: AsyncSessionDepends) -> Tokens:
     ]
   }
 )
-async def refresh(new_access_token: Annotated[AccessToken, Depends(renew_access_token)]):
+async def refresh(new_access_token: Annotated[AccessToken, Depends(renew_access_token)]) -> AccessToken:
   return new_access_token
+
+
+@auth_router.get("/.well-known/jwks.json",
+  summary="Public keys for local token verification",
+  responses={
+    "200":{
+      "description": "Returns JWKS document with public signing keys (empty for HMAC algorithms)",
+      "content": {
+        "application/json": {
+          "example": {"keys": [{"kty": "OKP", "crv": "Ed25519", "x": "string", "kid": "main", "alg": "EdDSA", "use": "sig"}]}
+        }
+      },
+    },
+  },
+)
+async def jwks(response: Response) -> dict:
+  response.headers["Cache-Control"] = "public, max-age=300"
+
+  return KeyRing.jwks()
@@ -1,12 +1,20 @@
 
 
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import timedelta, datetime, timezone
+import hashlib
 import secrets
-from typing import Any
-import jwt
+import time
+from typing import Any, Callable, TypeVar
+from fastapi import HTTPException, status
 from pwdlib import PasswordHash
 
 from auth.config import AuthConfig
+from auth.keyring import KeyRing
+from roles.utils import mask_to_roles, roles_to_mask
+from utils.cache import TTLCache
 
 
 password_hash = PasswordHash.recommended()
@@ -20,6 +28,74 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
   return password_hash.verify(plain_password, hashed_password)
 
 
+T = TypeVar("T")
+
+
+class _PasswordHashPool:
+  """
+  Argon2 takes tens of milliseconds of pure CPU, so running it inside endpoint
+  blocks every other request of the worker. This pool moves it to separate processes
+
+  :param max_workers: number of worker processes. With `0` hashing runs inline (i.e. for tests)
+
+  :param queue_depth: maximum number of in-flight jobs, extra ones are rejected with 503
+  """  
+  def __init__(self, max_workers: int, queue_depth: int) -> None:
+    self.max_workers = max_workers
+    self.queue_depth = queue_depth
+    self.in_flight = 0
+    self._executor: ProcessPoolExecutor | None = None
+
+
+  def get_executor(self) -> ProcessPoolExecutor:
+    if self._executor is None:
+      self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+    return self._executor
+
+
+  async def run(self, func: Callable[..., T], *args: Any) -> T:
+    if self.max_workers <= 0:
+      return func(*args)
+
+    if self.in_flight >= self.queue_depth:
+      raise HTTPException(
+        detail="too many authentication requests, try again later",
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"},
+      )
+
+    self.in_flight += 1
+    try:
+      loop = asyncio.get_running_loop()
+      return await loop.run_in_executor(self.get_executor(), func, *args)
+    except BrokenProcessPool:
+      self._executor = None
+      raise
+    finally:
+      self.in_flight -= 1
+
+
+  def shutdown(self) -> None:
+    if self._executor is not None:
+      self._executor.shutdown(wait=True, cancel_futures=True)
+      self._executor = None
+
+
+PasswordHashPool = _PasswordHashPool(
+  max_workers=AuthConfig.PASSWORD_HASH_POOL_SIZE,
+  queue_depth=AuthConfig.PASSWORD_HASH_QUEUE_DEPTH
+)
+
+
+async def hash_password_async(password: str) -> str:
+  return await PasswordHashPool.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+  return await PasswordHashPool.run(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     default_time_delta = timedelta(minutes=AuthConfig.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode: dict = data.copy()
@@ -31,7 +107,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
 
     to_encode["exp"] =  expire
 
-    result = jwt.encode(to_encode, AuthConfig.JWT_SECRET_KEY, algorithm=AuthConfig.JWT_ALGORITHM)
+    result = KeyRing.encode(to_encode)
 
     return result
 
@@ -49,13 +125,43 @@ def create_refresh_token(data: dict[str, Any], expires_delta: timedelta | None =
     to_encode["exp"] = expire
     to_encode["is_refresh"] = True
 
-    result = jwt.encode(to_encode, AuthConfig.JWT_SECRET_KEY, algorithm=AuthConfig.JWT_ALGORITHM)
+    result = KeyRing.encode(to_encode)
 
     return result
 
 
 def decode_token(token: str) -> dict[str, Any]:
-  return jwt.decode(token, AuthConfig.JWT_SECRET_KEY, algorithms=[AuthConfig.JWT_ALGORITHM])
+  return KeyRing.decode(token)
+
+
+DecodedTokensCache: TTLCache[bytes, dict[str, Any]] = TTLCache(
+  maxsize=AuthConfig.DECODED_TOKEN_CACHE_SIZE,
+  ttl=AuthConfig.REFRESH_TOKEN_EXPIRE_HOURS * 60 * 60
+)
+
+
+def decode_token_cached(token: str) -> dict[str, Any]:
+  """
+  Same as `decode_token`, but already verified tokens are served from `DecodedTokensCache`
+  until their `exp`. Expired or invalid tokens always go through `decode_token` and raise as usual
+
+  Returned claims are shared between calls, so do not mutate them
+  """  
+  digest = hashlib.sha256(token.encode()).digest()
+
+  payload = DecodedTokensCache.get(digest)
+
+  if payload is not None:
+    return payload
+
+  payload = decode_token(token)
+
+  exp = payload.get("exp")
+
+  if exp is not None:
+    DecodedTokensCache.set(digest, payload, ttl=exp - time.time())
+
+  return payload
 
 
 def get_expiration_time(expires_delta: timedelta) -> datetime:
@@ -66,15 +172,34 @@ def get_utc_time() -> datetime:
   return datetime.now(timezone.utc)
 
 
-def get_roles_from(encoded_data: dict[str, str]) -> list[str]:
+def get_roles_from(encoded_data: dict[str, Any]) -> list[str]:
   roles = encoded_data.get("roles")
 
   if roles is None:
     return []
 
+  if isinstance(roles, int):
+    return list(mask_to_roles(roles))
+
   return roles.split(" ")
 
 
+def get_roles_mask_from(encoded_data: dict[str, Any]) -> int:
+  """
+  Returns roles bitmask from token. Tokens issued before bitmask have space joined role names,
+  unknown role name in them raises KeyError
+  """  
+  roles = encoded_data.get("roles")
+
+  if roles is None:
+    return 0
+
+  if isinstance(roles, int):
+    return roles
+
+  return roles_to_mask(roles.split(" "), strict=True)
+
+
 def generate_verification_token() -> str:
     return secrets.token_urlsafe(AuthConfig.VERIFICATION_TOKEN_BITES_LEN)
 
@@ -33,5 +33,5 @@ class VerificationsORM(Base):
   
   id: Mapped[INT_PK]
   user_id: Mapped[int] = mapped_column(ForeignKey("users.user_id", ondelete="CASCADE"), unique=True)
-  token: Mapped[str]
-  expires_at: Mapped[datetime]
\ No newline at end of file
+  token: Mapped[str] = mapped_column(index=True, unique=True)
+  expires_at: Mapped[datetime] = mapped_column(index=True)
\ No newline at end of file
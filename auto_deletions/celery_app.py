@@ -1,17 +1,49 @@
 
 import asyncio
+from typing import Callable
 
-from celery import Celery
+from celery import Celery, Task
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
 
-from auth.verification.repository import VerificationRepository
 from db.connection import ConnectionManager
-from users.models import  OKResponce
-from users.repository import UsersRepository
+from notifications.config import NotificationsConfig
+from notifications.models import BatchMetrics
+from notifications.repository import OutboxRepository
+from notifications.transport import Transport, get_transport
 from auto_deletions.config import Config
+from auto_deletions.locks import Lease, LockLostError, _TaskLocks, get_lock_backend
+from auto_deletions.models import PurgeBatchMetrics, PurgeProgress
+from auto_deletions.repository import PurgeRepository
+from auto_deletions.worker import _WorkerRuntime
 
 
 app = Celery(broker=Config.URL, backend=Config.URL)
 
+WorkerRuntime = _WorkerRuntime(ConnectionManager)
+
+TaskLocks = _TaskLocks(
+  get_lock_backend(Config.LOCK_BACKEND, Config.URL),
+  ttl_ms=int(Config.LOCK_TTL_SECONDS * 1000),
+  wait_seconds=Config.LOCK_WAIT_SECONDS
+)
+
+PURGE_LOCK = "purge_expired_users"
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+  """
+  Prefork child process starts with its own loop and empty connection pool
+  """  
+  WorkerRuntime.after_fork()
+  WorkerRuntime.start()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def shutdown_worker(**kwargs):
+  WorkerRuntime.stop()
+
 
 @app.on_after_configure.connect #type: ignore
 def setup_periodic_tasks(sender: Celery, **kwargs):
@@ -22,40 +54,155 @@ def setup_periodic_tasks(sender: Celery, **kwargs):
 
   every_12_houres = 60 * 60 * 12
   sender.add_periodic_task(every_12_houres, delete_expired_users_task.s(), name='delete expired users')
+  sender.add_periodic_task(NotificationsConfig.OUTBOX_POLL_SECONDS, deliver_outbox_task.s(), name='deliver outbox')
+
+
+PROGRESS_STATE = "PROGRESS"
+
+
+@app.task(bind=True)
+def delete_expired_users_task(self: Task):
+  """
+  Purges not verified users with expired verification in batches 
+  until nothing is left or `PURGE_MAX_BATCHES_PER_RUN` is reached.
+  Progress is published as `PROGRESS` state after every batch.
+
+  Only one purge runs at a time (scheduled or manual), duplicate invocation is skipped,
+  its work is done by the running one. Lock is extended before every batch and its fencing token
+  is checked by database in every batch, so purge whose lock expired stops without writing
+  """  
+  with TaskLocks.hold(PURGE_LOCK) as lease:
+    if lease is None:
+      return {'status': 'skipped', 'message': 'purge is already running'}
+
+    # Task request is thread-local and callback runs in other thread, so id is passed explicitly
+    task_id = self.request.id
+
+    def report_progress(batches: list[PurgeBatchMetrics]) -> None:
+      progress = PurgeProgress(batches_count=len(batches), deleted_count=sum(batch.deleted for batch in batches))
+      self.update_state(task_id=task_id, state=PROGRESS_STATE, meta=progress.model_dump())
+
+    try:
+      batches = WorkerRuntime.run(purge_expired_users(
+        Config.PURGE_BATCH_SIZE, 
+        Config.PURGE_MAX_BATCHES_PER_RUN, 
+        Config.PURGE_THROTTLE_SECONDS,
+        on_batch=report_progress,
+        lease=lease
+      ))
+
+      deleted_count = sum(batch.deleted for batch in batches)
+      seconds = sum(batch.seconds for batch in batches)
+
+      return {
+          'status': 'success',
+          'deleted_count': deleted_count,
+          'batches_count': len(batches),
+          'rows_per_second': deleted_count / seconds if seconds > 0 else 0.0,
+          'fencing_token': lease.token,
+      }
+    except LockLostError as e:
+        print(f"Expired users purge stopped: {str(e)}")
+        return {
+            'status': 'lost',
+            'message': str(e)
+        }
+    except Exception as e:
+        print(f"Error deleting expired users: {str(e)}")
+        return {
+            'status': 'error',
+            'message': str(e)
+        }
+
+
+async def purge_expired_users(
+  batch_size: int, 
+  max_batches: int, 
+  throttle_seconds: float,
+  on_batch: Callable[[list[PurgeBatchMetrics]], None] | None = None,
+  lease: Lease | None = None
+) -> list[PurgeBatchMetrics]:
+  """
+  Every batch is committed in its own session, so locks on `users` are held only for one batch.
+  Sleeps *throttle_seconds* between full batches to leave room for API traffic.
+  *on_batch* is called with all finished batches after each one.
+
+  *lease* is extended before every batch and fences every batch.
+  Blocking calls (*on_batch*, lock backend) run in threads, so they do not stall worker loop
+
+  :raises LockLostError: *lease* expired or was superseded, remaining batches are not run
+  """  
+  batches: list[PurgeBatchMetrics] = []
+
+  for _ in range(max_batches):
+    if lease is not None:
+      await asyncio.to_thread(TaskLocks.extend, lease)
+
+    async with ConnectionManager.get_session_ctx() as session:
+      batch = await PurgeRepository.purge_expired_users_batch(session, batch_size, lease)
+
+    if batch.claimed:
+      batches.append(batch)
+      print(
+        f"purge batch: claimed={batch.claimed} deleted={batch.deleted} "
+        f"seconds={batch.seconds:.3f} rate={batch.rows_per_second:.1f}/s"
+      )
+
+      if on_batch is not None:
+        await asyncio.to_thread(on_batch, batches)
+
+    if batch.claimed < batch_size:
+      break
+
+    await asyncio.sleep(throttle_seconds)
+
+  return batches
 
 
 @app.task
-def delete_expired_users_task():
+def deliver_outbox_task():
   """
-    Forgive me for code repetitions. 
-    It should be implemented with appropriate Pydantic models
+  Sends pending outbox messages in batches until outbox is drained 
+  or `OUTBOX_MAX_BATCHES_PER_RUN` is reached
   """  
   try:
-    result: list[OKResponce] | None = asyncio.run(expired_users())
-
-    if result is None:
-      return {'status': 'success', 'deleted_count': 0}
+    batches = WorkerRuntime.run(deliver_outbox(get_transport()))
 
     return {
-        'status': 'success',
-        'deleted_count': len(result),
-        'deleted_users': [el.model_dump() for el in result]
+      'status': 'success',
+      'sent_count': sum(batch.sent for batch in batches),
+      'failed_count': sum(batch.failed for batch in batches),
+      'dead_count': sum(batch.dead for batch in batches),
+      'batches': [{**batch.model_dump(), 'messages_per_second': batch.messages_per_second} for batch in batches]
     }
   except Exception as e:
-      print(f"Error deleting expired users: {str(e)}")
-      return {
-          'status': 'error',
-          'message': str(e)
-      }
+    print(f"Error delivering outbox: {str(e)}")
+    return {
+        'status': 'error',
+        'message': str(e)
+    }
+
+
+async def deliver_outbox(transport: Transport) -> list[BatchMetrics]:
+  batches: list[BatchMetrics] = []
 
+  for _ in range(NotificationsConfig.OUTBOX_MAX_BATCHES_PER_RUN):
+    async with ConnectionManager.get_session_ctx() as session:
+      batch = await OutboxRepository.deliver_batch(
+        session, 
+        transport, 
+        NotificationsConfig.OUTBOX_BATCH_SIZE, 
+        NotificationsConfig.OUTBOX_MAX_ATTEMPTS
+      )
 
-async def expired_users() -> list[OKResponce] | None:
-  async with ConnectionManager.get_session_ctx() as session:
-    expired_users_id = await VerificationRepository.get_expired_users(session)
+    if batch.claimed or batch.dead:
+      batches.append(batch)
+      print(
+        f"outbox batch: claimed={batch.claimed} sent={batch.sent} failed={batch.failed} dead={batch.dead} "
+        f"seconds={batch.seconds:.3f} rate={batch.messages_per_second:.1f}/s"
+      )
 
-    if not expired_users_id:
-      raise ValueError("expired users not found")
+    if batch.claimed < NotificationsConfig.OUTBOX_BATCH_SIZE:
+      break
 
-    deleted_users = await UsersRepository.delete_users(session, list(expired_users_id))
-    
-    return deleted_users
\ No newline at end of file
+  return batches
\ No newline at end of file
@@ -7,6 +7,16 @@ class _Config(ConfigModel):
   REDIS_HOST: str
   REDIS_PORT: int
 
+  #Expired users purge, every batch is a separate transaction
+  PURGE_BATCH_SIZE: int = 1000
+  PURGE_MAX_BATCHES_PER_RUN: int = 1000
+  PURGE_THROTTLE_SECONDS: float = 0.05
+
+  #Single-flight task locks: redis | memory
+  LOCK_BACKEND: str = "redis"
+  LOCK_TTL_SECONDS: float = 300
+  LOCK_WAIT_SECONDS: float = 0
+
 
   @property
   def URL(self) -> str:
@@ -0,0 +1,247 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+import threading
+import time
+from typing import Iterator, Protocol
+import uuid
+
+import redis
+
+
+@dataclass(frozen=True)
+class Lease:
+  """
+  :param token: fencing token, it grows with every successful acquire of the same lock,
+  so holder with smaller token knows it was superseded
+  """
+  name: str
+  owner: str
+  token: int
+
+
+class LockBackend(Protocol):
+  """
+  All methods are atomic. Lock expires by itself after *ttl_ms*, so crashed holder never blocks forever
+  """
+  def acquire(self, name: str, owner: str, ttl_ms: int) -> int | None: ...
+
+  def extend(self, name: str, owner: str, ttl_ms: int) -> bool: ...
+
+  def release(self, name: str, owner: str) -> bool: ...
+
+  def incr_stat(self, name: str, field: str, amount: float = 1) -> None: ...
+
+  def stats(self, name: str) -> dict[str, float]: ...
+
+
+class RedisLockBackend:
+  """
+  `SET key owner NX PX ttl` and fencing `INCR` in one script. 
+  Extend and release compare owner first, so expired holder can not touch lock taken by other one
+  """
+  ACQUIRE = """
+  if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return redis.call('INCR', KEYS[2])
+  end
+  return nil
+  """
+
+  EXTEND = """
+  if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+  end
+  return 0
+  """
+
+  RELEASE = """
+  if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+  end
+  return 0
+  """
+
+  def __init__(self, client: redis.Redis, prefix: str = "lock:") -> None:
+    self.client = client
+    self.prefix = prefix
+    self.acquire_script = client.register_script(self.ACQUIRE)
+    self.extend_script = client.register_script(self.EXTEND)
+    self.release_script = client.register_script(self.RELEASE)
+
+
+  def acquire(self, name: str, owner: str, ttl_ms: int) -> int | None:
+    token = self.acquire_script(keys=[self.prefix + name, self.prefix + name + ":fence"], args=[owner, ttl_ms])
+
+    return None if token is None else int(token)
+
+
+  def extend(self, name: str, owner: str, ttl_ms: int) -> bool:
+    return bool(self.extend_script(keys=[self.prefix + name], args=[owner, ttl_ms]))
+
+
+  def release(self, name: str, owner: str) -> bool:
+    return bool(self.release_script(keys=[self.prefix + name], args=[owner]))
+
+
+  def incr_stat(self, name: str, field: str, amount: float = 1) -> None:
+    self.client.hincrbyfloat(self.prefix + name + ":stats", field, amount)
+
+
+  def stats(self, name: str) -> dict[str, float]:
+    data = self.client.hgetall(self.prefix + name + ":stats")
+
+    return {key.decode(): float(value) for key, value in data.items()} # type: ignore
+
+
+class InMemoryLockBackend:
+  """
+  Same semantics as `RedisLockBackend` inside one process, for tests and single worker setups
+  """
+  def __init__(self) -> None:
+    self.locks: dict[str, tuple[str, float]] = {}
+    self.fences: dict[str, int] = {}
+    self.counters: dict[str, dict[str, float]] = {}
+    self.mutex = threading.Lock()
+
+
+  def holder(self, name: str) -> str | None:
+    lock = self.locks.get(name)
+
+    if lock is None or lock[1] <= time.monotonic():
+      return None
+
+    return lock[0]
+
+
+  def acquire(self, name: str, owner: str, ttl_ms: int) -> int | None:
+    with self.mutex:
+      if self.holder(name) is not None:
+        return None
+
+      self.locks[name] = (owner, time.monotonic() + ttl_ms / 1000)
+      self.fences[name] = self.fences.get(name, 0) + 1
+
+      return self.fences[name]
+
+
+  def extend(self, name: str, owner: str, ttl_ms: int) -> bool:
+    with self.mutex:
+      if self.holder(name) != owner:
+        return False
+
+      self.locks[name] = (owner, time.monotonic() + ttl_ms / 1000)
+
+      return True
+
+
+  def release(self, name: str, owner: str) -> bool:
+    with self.mutex:
+      if self.holder(name) != owner:
+        return False
+
+      del self.locks[name]
+
+      return True
+
+
+  def incr_stat(self, name: str, field: str, amount: float = 1) -> None:
+    with self.mutex:
+      stats = self.counters.setdefault(name, {})
+      stats[field] = stats.get(field, 0) + amount
+
+
+  def stats(self, name: str) -> dict[str, float]:
+    with self.mutex:
+      return dict(self.counters.get(name, {}))
+
+
+class LockLostError(RuntimeError):
+  pass
+
+
+class _TaskLocks:
+  """
+  Single-flight guard for periodic and manually started tasks:
+
+      with TaskLocks.hold("purge_expired_users") as lease:
+        if lease is None:
+          return  # same task is already running, this invocation is skipped
+
+  Records `acquired`, `skipped` and `wait_seconds` (time spent waiting for lock) per lock name
+
+  :param ttl_ms: lock lifetime, long tasks prolong it with `extend`
+
+  :param wait_seconds: how long duplicate invocation waits for lock before it is skipped
+  """
+  def __init__(
+    self, 
+    backend: LockBackend, 
+    ttl_ms: int, 
+    wait_seconds: float = 0, 
+    poll_seconds: float = 0.1
+  ) -> None:
+    self.backend = backend
+    self.ttl_ms = ttl_ms
+    self.wait_seconds = wait_seconds
+    self.poll_seconds = poll_seconds
+
+
+  def acquire(self, name: str, wait_seconds: float | None = None) -> Lease | None:
+    owner = uuid.uuid4().hex
+    deadline = time.monotonic() + (self.wait_seconds if wait_seconds is None else wait_seconds)
+    start = time.monotonic()
+
+    while True:
+      token = self.backend.acquire(name, owner, self.ttl_ms)
+
+      if token is not None or time.monotonic() >= deadline:
+        break
+
+      time.sleep(self.poll_seconds)
+
+    self.backend.incr_stat(name, "wait_seconds", time.monotonic() - start)
+
+    if token is None:
+      self.backend.incr_stat(name, "skipped")
+      return None
+
+    self.backend.incr_stat(name, "acquired")
+
+    return Lease(name=name, owner=owner, token=token)
+
+
+  def extend(self, lease: Lease) -> None:
+    """
+    :raises LockLostError: lock expired and can be held by other worker, work must be stopped
+    """
+    if not self.backend.extend(lease.name, lease.owner, self.ttl_ms):
+      self.backend.incr_stat(lease.name, "lost")
+      raise LockLostError(f"lock {lease.name} with fencing token {lease.token} is lost")
+
+
+  def release(self, lease: Lease) -> None:
+    self.backend.release(lease.name, lease.owner)
+
+
+  @contextmanager
+  def hold(self, name: str, wait_seconds: float | None = None) -> Iterator[Lease | None]:
+    lease = self.acquire(name, wait_seconds)
+
+    try:
+      yield lease
+    finally:
+      if lease is not None:
+        self.release(lease)
+
+
+  def stats(self, name: str) -> dict[str, float]:
+    return self.backend.stats(name)
+
+
+def get_lock_backend(name: str, redis_url: str) -> LockBackend:
+  match name:
+    case "redis":
+      return RedisLockBackend(redis.Redis.from_url(redis_url))
+    case "memory":
+      return InMemoryLockBackend()
+    case _:
+      raise ValueError(f"unknown lock backend {name}")
@@ -0,0 +1,65 @@
+from typing import Any
+
+from pydantic import BaseModel
+from sqlalchemy import BigInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.models import Base
+
+
+class TaskAccepted(BaseModel):
+  task_id: str
+  status_url: str
+
+
+class PurgeProgress(BaseModel):
+  batches_count: int
+  deleted_count: int
+
+
+class PurgeBatchMetrics(BaseModel):
+  """
+  :param claimed: expired verification rows taken by batch
+
+  :param deleted: users actually deleted (verified users only lose their stale verification row)
+  """
+  claimed: int
+  deleted: int
+  seconds: float
+
+  @property
+  def rows_per_second(self) -> float:
+    if self.seconds <= 0:
+      return 0.0
+
+    return self.deleted / self.seconds
+
+
+class TaskStatus(BaseModel):
+  """
+  :param state: celery state: `PENDING` (queued or unknown id), `PROGRESS`, `SUCCESS` or `FAILURE`
+
+  :param progress: filled while task is running
+
+  :param result: task return value when it is finished
+  """
+  task_id: str
+  state: str
+  progress: PurgeProgress | None = None
+  result: dict[str, Any] | None = None
+
+
+class MaintenanceLeasesORM(Base):
+  """
+  Highest fencing token that has written under each task lock. Batch of lease holder
+  with smaller token is rejected by database, so worker whose lock expired
+  can not write after new holder started, even if it has not noticed it yet.
+
+  Fencing tokens come from lock backend, if its counter is reset (i.e. redis data is lost)
+  row of that lock must be deleted too
+  """
+
+  __tablename__ = "maintenance_leases"
+
+  name: Mapped[str] = mapped_column(primary_key=True)
+  token: Mapped[int] = mapped_column(BigInteger)
@@ -0,0 +1,107 @@
+import time
+
+from sqlalchemy import delete, exists, func, select
+from sqlalchemy.dialects.postgresql import array_agg, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth.utils import get_utc_time
+from auth.verification.models import VerificationsORM
+from auto_deletions.locks import Lease, LockLostError
+from auto_deletions.models import MaintenanceLeasesORM, PurgeBatchMetrics
+from users.models import UsersORM
+from users.repository import UsersCache
+
+
+class PurgeRepository:
+
+  @staticmethod
+  async def purge_expired_users_batch(
+    session: AsyncSession, 
+    batch_size: int, 
+    lease: Lease | None = None
+  ) -> PurgeBatchMetrics:
+    """
+    Deletes not verified users of at most *batch_size* expired verifications in one statement and commits.
+
+    Verifications are claimed with `FOR UPDATE SKIP LOCKED`, so concurrent purges take different rows.
+    Stale rows of already verified users are deleted too, so they are not claimed again
+
+    :param lease: task lock held by caller. Its fencing token is recorded in `maintenance_leases`
+    by the same statement, and nothing is claimed when bigger token was recorded before
+
+    :raises LockLostError: *lease* was superseded by other holder
+    """    
+    start = time.perf_counter()
+
+    claimed = (
+      select(VerificationsORM.id, VerificationsORM.user_id)
+      .filter(VerificationsORM.expires_at < get_utc_time())
+    )
+
+    fence = None
+
+    if lease is not None:
+      fence_stmt = pg_insert(MaintenanceLeasesORM).values(name=lease.name, token=lease.token)
+      fence = (
+        fence_stmt
+        .on_conflict_do_update(
+          index_elements=[MaintenanceLeasesORM.name],
+          set_={"token": fence_stmt.excluded.token},
+          where=MaintenanceLeasesORM.token <= fence_stmt.excluded.token
+        )
+        .returning(MaintenanceLeasesORM.token)
+        .cte("fence")
+      )
+      claimed = claimed.filter(exists(select(fence.c.token)))
+
+    claimed = (
+      claimed
+      .order_by(VerificationsORM.expires_at)
+      .limit(batch_size)
+      .with_for_update(skip_locked=True)
+      .cte("claimed")
+      .prefix_with("MATERIALIZED")
+    )
+
+    deleted_users = (
+      delete(UsersORM)
+      .filter(UsersORM.user_id == claimed.c.user_id, UsersORM.is_verified.is_(False))
+      .returning(UsersORM.user_id)
+      .cte("deleted_users")
+    )
+
+    # Outer statement sees users before deletion, so this never touches rows cascaded by `deleted_users`
+    stale_verifications = (
+      delete(VerificationsORM)
+      .filter(
+        VerificationsORM.id == claimed.c.id, 
+        UsersORM.user_id == claimed.c.user_id, 
+        UsersORM.is_verified.is_(True)
+      )
+      .cte("stale_verifications")
+    )
+
+    query = (
+      select(
+        select(func.count()).select_from(claimed).scalar_subquery().label("claimed"),
+        select(array_agg(deleted_users.c.user_id)).scalar_subquery().label("deleted"),
+      )
+      .add_cte(stale_verifications)
+    )
+
+    if fence is not None:
+      query = query.add_columns(select(fence.c.token).scalar_subquery().label("fenced"))
+
+    row = (await session.execute(query)).one()
+
+    if lease is not None and row.fenced is None:
+      await session.rollback()
+      raise LockLostError(f"lock {lease.name} with fencing token {lease.token} is superseded")
+
+    await session.commit()
+
+    deleted = row.deleted or []
+
+    UsersCache.invalidate(*deleted)
+
+    return PurgeBatchMetrics(claimed=row.claimed, deleted=len(deleted), seconds=time.perf_counter() - start)
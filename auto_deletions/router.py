@@ -1,9 +1,12 @@
 
-from fastapi import APIRouter
+from celery.result import AsyncResult
+from fastapi import APIRouter, Request, status
+from fastapi.concurrency import run_in_threadpool
 
 # from auth.verification.models import VerificationsORM
 # from auth.verification.repository import VerificationRepository
-from auto_deletions.celery_app import delete_expired_users_task
+from auto_deletions.celery_app import PROGRESS_STATE, app, delete_expired_users_task
+from auto_deletions.models import PurgeProgress, TaskAccepted, TaskStatus
 # from db.connection import AsyncSessionDepends
 # from users.models import  UsersORM
 # from users.repository import UsersRepository
@@ -35,12 +38,40 @@ celery_router = APIRouter(prefix="/celery", tags=["celery"])
 #   await session.commit()
 
 
-@celery_router.get("/expire")
-async def delete_expired_users():
+def get_task_status(result: AsyncResult) -> TaskStatus:
   """
-  Manually removes from DB expired users by calling *celery* task `delete_expired_users_task`
+  Reads task state from result backend (blocking call, run it in threadpool)
   """  
+  task_status = TaskStatus(task_id=result.id, state=result.state)
 
-  result = delete_expired_users_task.delay()
-  
-  return result.get()
\ No newline at end of file
+  if result.state == PROGRESS_STATE and isinstance(result.info, dict):
+    task_status.progress = PurgeProgress.model_validate(result.info)
+  elif result.state == "SUCCESS" and isinstance(result.info, dict):
+    task_status.result = result.info
+  elif result.state == "FAILURE":
+    task_status.result = {"status": "error", "message": str(result.info)}
+
+  return task_status
+
+
+@celery_router.get("/expire", status_code=status.HTTP_202_ACCEPTED)
+async def delete_expired_users(request: Request) -> TaskAccepted:
+  """
+  Manually starts *celery* task `delete_expired_users_task` and returns right away.
+  Follow `status_url` to get its progress and result
+  """  
+  result = await run_in_threadpool(delete_expired_users_task.delay)
+
+  return TaskAccepted(
+    task_id=result.id, 
+    status_url=str(request.url_for("get_task", task_id=result.id))
+  )
+
+
+@celery_router.get("/tasks/{task_id}", name="get_task")
+async def get_task(task_id: str) -> TaskStatus:
+  """
+  State of task started by this API: `PENDING`, `PROGRESS` (with batches and deleted rows so far), 
+  `SUCCESS` or `FAILURE` (with result)
+  """  
+  return await run_in_threadpool(get_task_status, AsyncResult(task_id, app=app))
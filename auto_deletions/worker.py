@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from typing import Any, Coroutine, TypeVar
+
+from db.connection import _ConnectionManager
+
+
+T = TypeVar("T")
+
+
+class _WorkerRuntime:
+  """
+  One long-lived event loop per celery worker process, running in its own thread.
+
+  Engine pool is bound to the loop that opened its connections, so all async task bodies 
+  must run on this loop (not in new `asyncio.run` loop every time) to reuse pooled connections.
+  Works with any worker pool: tasks from prefork, solo or threads pools are submitted to the same loop
+
+  :param manager: connection manager used by tasks, its engine is disposed on `stop`
+  """
+  def __init__(self, manager: _ConnectionManager) -> None:
+    self.manager = manager
+    self.loop: asyncio.AbstractEventLoop | None = None
+    self.thread: threading.Thread | None = None
+    self.lock = threading.Lock()
+
+
+  def start(self) -> asyncio.AbstractEventLoop:
+    with self.lock:
+      if self.loop is None:
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="worker-event-loop", daemon=True)
+        self.thread.start()
+
+      return self.loop
+
+
+  def after_fork(self) -> None:
+    """
+    Child process inherits parent's pooled sockets and (not running) loop thread, 
+    both are dropped without closing them, they still belong to the parent
+    """
+    self.manager.engine.sync_engine.dispose(close=False)
+    self.loop = None
+    self.thread = None
+    self.lock = threading.Lock()
+
+
+  def run(self, coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Runs *coro* on worker loop and blocks calling thread until it is done
+    """
+    loop = self.start()
+
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+  def stop(self) -> None:
+    """
+    Disposes engine on its own loop, then stops and closes the loop. Safe to call several times
+    """
+    with self.lock:
+      loop, thread = self.loop, self.thread
+      self.loop, self.thread = None, None
+
+    if loop is None or thread is None:
+      return
+
+    try:
+      asyncio.run_coroutine_threadsafe(self.manager.dispose(), loop).result()
+      asyncio.run_coroutine_threadsafe(loop.shutdown_asyncgens(), loop).result()
+    finally:
+      loop.call_soon_threadsafe(loop.stop)
+      thread.join()
+      loop.close()
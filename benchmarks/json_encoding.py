@@ -0,0 +1,81 @@
+"""
+Compares two ways FastAPI encodes typed responses of `/users/` (page of users) and `/auth/login`:
+
+- dict: `serialize_response` to python objects + `JSONResponse` (`json.dumps`), used when
+  route has custom `response_class` or no return type
+- bytes: `serialize_response(dump_json=True)`, pydantic-core writes JSON bytes directly.
+  It is used for every route of this API, see `test_json_routes_use_fast_serialization`
+
+Both must produce identical bytes, script fails otherwise
+
+    PYTHONPATH=. python benchmarks/json_encoding.py --users 1000
+"""
+import argparse
+import asyncio
+from datetime import datetime
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from auth.models import Tokens
+from auth.router import auth_router
+from users.models import PublicUser
+from users.router import users_router
+from utils.pagination import Page
+
+
+def get_route(routes, path: str, method: str) -> APIRoute:
+  return next(
+    route for route in routes 
+    if isinstance(route, APIRoute) and route.path == path and method in route.methods
+  )
+
+
+async def encode(route: APIRoute, content, dump_json: bool) -> bytes:
+  result = await serialize_response(
+    field=route.response_field, 
+    response_content=content,
+    exclude_unset=route.response_model_exclude_unset,
+    dump_json=dump_json
+  )
+
+  return result if dump_json else JSONResponse(result).body
+
+
+async def measure(route: APIRoute, content, number: int) -> None:
+  assert await encode(route, content, False) == await encode(route, content, True)
+
+  for name, dump_json in [("dict", False), ("bytes", True)]:
+    start = time.perf_counter()
+
+    for _ in range(number):
+      await encode(route, content, dump_json)
+
+    print(f"{route.path:<12} {name:<6} {(time.perf_counter() - start) / number * 1_000_000:10.1f}us per response")
+
+
+async def main(users: int, number: int) -> None:
+  page = Page(
+    items=[
+      PublicUser(
+        user_id=i, email=f"user{i}@mail.com", first_name=f"Имя {i}", last_name=None, 
+        created_at=datetime.now(), is_verified=i % 2 == 0
+      ) for i in range(users)
+    ], 
+    next_cursor="eyJhZnRlciI6IDEyfQ"
+  )
+
+  tokens = Tokens(access_token="a" * 200, refresh_token="r" * 200, token_type="bearer")
+
+  await measure(get_route(users_router.routes, "/users/", "GET"), page, max(number // users, 10))
+  await measure(get_route(auth_router.routes, "/auth/login", "POST"), tokens, number)
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--users", type=int, default=1000)
+  parser.add_argument("--number", type=int, default=20_000)
+  args = parser.parse_args()
+
+  asyncio.run(main(args.users, args.number))
@@ -0,0 +1,87 @@
+"""
+Compares list endpoints serialization paths on N users:
+
+- orm: `select(UsersORM)` + `model_validate(el, from_attributes=True)` per row
+- rows: `select(columns)` + one `validate_rows` call (cached `TypeAdapter`)
+
+Rows are inserted in transaction that is rolled back at the end, so any dev database works
+
+    PYTHONPATH=. python benchmarks/list_serialization.py --rows 10000 100000
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from db.config import DBConfig
+from db.connection import _ConnectionManager
+from users.models import PUBLIC_USER_FIELDS, PublicUser, UsersORM
+from utils.serialization import validate_rows
+
+
+async def orm_path(conn: AsyncConnection) -> list[PublicUser]:
+  async with AsyncSession(bind=conn) as session:
+    data = await session.scalars(select(UsersORM))
+
+    return [PublicUser.model_validate(el, from_attributes=True) for el in data]
+
+
+async def rows_path(conn: AsyncConnection) -> list[PublicUser]:
+  columns = [getattr(UsersORM, field) for field in PUBLIC_USER_FIELDS]
+
+  rows = (await conn.execute(select(*columns))).all()
+
+  return validate_rows(PublicUser, rows)
+
+
+async def measure(conn: AsyncConnection, path, repeat: int) -> tuple[float, float]:
+  """
+  :returns: best duration in ms and peak python memory in MiB (measured in separate run)
+  """
+  durations = []
+
+  for _ in range(repeat):
+    start = time.perf_counter()
+    await path(conn)
+    durations.append((time.perf_counter() - start) * 1000)
+
+  tracemalloc.start()
+  await path(conn)
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+
+  return min(durations), peak / 1024 / 1024
+
+
+async def main(sizes: list[int], repeat: int) -> None:
+  manager = _ConnectionManager(url=DBConfig.DNS)
+
+  print(f"{'rows':>8} {'path':<6} {'best ms':>10} {'peak MiB':>10}")
+
+  async with manager.engine.connect() as conn:
+    for size in sizes:
+      await conn.execute(text("DELETE FROM users"))
+      await conn.execute(text(
+        "INSERT INTO users (email, password, first_name) "
+        "SELECT 'bench' || i || '@mail.com', 'password_hash', 'name' || i FROM generate_series(1, :size) AS i"
+      ), {"size": size})
+
+      for name, path in [("orm", orm_path), ("rows", rows_path)]:
+        best, peak = await measure(conn, path, repeat)
+        print(f"{size:>8} {name:<6} {best:>10.1f} {peak:>10.1f}")
+
+    await conn.rollback()
+
+  await manager.dispose()
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+  parser.add_argument("--repeat", type=int, default=3)
+  args = parser.parse_args()
+
+  asyncio.run(main(args.rows, args.repeat))
@@ -0,0 +1,90 @@
+"""
+Measures `/users/me` latency while `/auth/login` is saturated.
+
+Start the API first (`uvicorn main:app --port 8000`, one worker) and then:
+
+    PYTHONPATH=. python benchmarks/login_saturation.py --base-url http://localhost:8000
+
+With password hashing running on the event loop p99 of `/users/me` grows with
+login concurrency, with `PasswordHashPool` it should stay close to the idle value
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from db.config import DBConfig
+
+
+def percentile(samples: list[float], p: float) -> float:
+  ordered = sorted(samples)
+  index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+  return ordered[index]
+
+
+def report(name: str, samples: list[float]) -> None:
+  print(
+    f"{name:<20} n={len(samples):<6} "
+    f"p50={percentile(samples, 50):8.2f}ms "
+    f"p99={percentile(samples, 99):8.2f}ms "
+    f"mean={statistics.fmean(samples):8.2f}ms"
+  )
+
+
+async def probe_me(client: httpx.AsyncClient, headers: dict[str, str], duration: float) -> list[float]:
+  samples = []
+  deadline = time.perf_counter() + duration
+
+  while time.perf_counter() < deadline:
+    start = time.perf_counter()
+    resp = await client.get("/users/me", headers=headers)
+    samples.append((time.perf_counter() - start) * 1000)
+    resp.raise_for_status()
+    await asyncio.sleep(0.01)
+
+  return samples
+
+
+async def hammer_login(client: httpx.AsyncClient, credentials: dict[str, str], stop: asyncio.Event) -> int:
+  done = 0
+
+  while not stop.is_set():
+    await client.post("/auth/login", json=credentials)
+    done += 1
+
+  return done
+
+
+async def main(base_url: str, concurrency: int, duration: float) -> None:
+  credentials = dict(email=DBConfig.ADMIN_EMAIL, password=DBConfig.ADMIN_PASSWORD)
+
+  limits = httpx.Limits(max_connections=concurrency + 10)
+  async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+    resp = await client.post("/auth/login", json=credentials)
+    resp.raise_for_status()
+    headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+    report("idle /users/me", await probe_me(client, headers, duration))
+
+    stop = asyncio.Event()
+    loaders = [asyncio.create_task(hammer_login(client, credentials, stop)) for _ in range(concurrency)]
+
+    samples = await probe_me(client, headers, duration)
+
+    stop.set()
+    logins = sum(await asyncio.gather(*loaders))
+
+    report("loaded /users/me", samples)
+    print(f"logins served: {logins} ({logins / duration:.1f}/s)")
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--base-url", default="http://localhost:8000")
+  parser.add_argument("--concurrency", type=int, default=32)
+  parser.add_argument("--duration", type=float, default=10.0)
+  args = parser.parse_args()
+
+  asyncio.run(main(args.base_url, args.concurrency, args.duration))
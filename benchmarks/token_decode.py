@@ -0,0 +1,29 @@
+"""
+Compares per-request cost of `decode_token` and `decode_token_cached` for a repeated access token
+
+    PYTHONPATH=. python benchmarks/token_decode.py
+"""
+import argparse
+import timeit
+
+from auth.utils import DecodedTokensCache, create_access_token, decode_token, decode_token_cached
+
+
+def main(number: int) -> None:
+  token = create_access_token({"user_id": 1, "roles": "admin user"})
+
+  DecodedTokensCache.clear()
+
+  for name, func in [("decode_token", decode_token), ("decode_token_cached", decode_token_cached)]:
+    seconds = min(timeit.repeat(lambda: func(token), number=number, repeat=5))
+    print(f"{name:<20} {seconds / number * 1_000_000:8.2f}us per call")
+
+  print(DecodedTokensCache.stats())
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--number", type=int, default=20_000)
+  args = parser.parse_args()
+
+  main(args.number)
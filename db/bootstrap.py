@@ -0,0 +1,157 @@
+from pathlib import Path
+import asyncio
+import time
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from auth.utils import hash_password_async
+from db.config import DBConfig
+from db.connection import _ConnectionManager
+from notifications.models import OutboxORM
+from roles.models import AvailableRoles, RolesORM
+from roles.repository import RolesCatalog
+from users.models import UsersORM
+from users_roles.models import UsersRolesORM
+
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+# Any constant works, it only has to be the same for all API workers
+BOOTSTRAP_LOCK_ID = 7_240_001
+
+
+def get_alembic_config(connection: Connection | None = None) -> Config:
+  config = Config(str(ALEMBIC_INI))
+  config.set_main_option("script_location", str(ALEMBIC_INI.parent / "migrations"))
+  config.attributes["connection"] = connection
+
+  return config
+
+
+def sync_schema(connection: Connection, migrate: bool) -> str | None:
+  """
+  Compares database revision with migrations head.
+  Outdated schema is upgraded when *migrate* is set, otherwise startup fails.
+  Database without alembic version is upgraded only when it has pre-migrations schema (see 0001)
+  """
+  config = get_alembic_config(connection)
+
+  head = ScriptDirectory.from_config(config).get_current_head()
+  current = MigrationContext.configure(connection).get_current_revision()
+
+  if current == head:
+    return current
+
+  if not migrate:
+    raise RuntimeError(f"database schema is at {current}, expected {head}. Run `alembic upgrade head`")
+
+  inspector = inspect(connection)
+
+  if current is None and inspector.has_table(UsersORM.__tablename__):
+    if inspector.has_table(OutboxORM.__tablename__):
+      raise RuntimeError(
+        "database has tables of later migrations but no alembic version. "
+        "Run `alembic stamp <revision>` with revision of its schema"
+      )
+
+    # Database created by `/refresh` before migrations were added, its tables are exactly those of 0001
+    command.stamp(config, "0001")
+
+  command.upgrade(config, "head")
+
+  return head
+
+
+async def seed_defaults(conn: AsyncConnection) -> None:
+  """
+  Idempotently inserts `AvailableRoles` and main admin with admin role.
+  Admin password is hashed only when admin does not exist yet
+  """
+  await conn.execute(
+    insert(RolesORM)
+    .values([{"role": role} for role in AvailableRoles])
+    .on_conflict_do_nothing(index_elements=[RolesORM.role])
+  )
+  RolesCatalog.invalidate()
+
+  admin_id = await conn.scalar(select(UsersORM.user_id).filter_by(email=DBConfig.ADMIN_EMAIL))
+
+  if admin_id is None:
+    admin_id = await conn.scalar(
+      insert(UsersORM)
+      .values(
+        email=DBConfig.ADMIN_EMAIL,
+        password=await hash_password_async(DBConfig.ADMIN_PASSWORD),
+        is_verified=True
+      )
+      .on_conflict_do_nothing(index_elements=[UsersORM.email])
+      .returning(UsersORM.user_id)
+    )
+
+  if admin_id is None:
+    return
+
+  admin_role_id = select(RolesORM.role_id).filter_by(role=AvailableRoles.ADMIN).scalar_subquery()
+
+  await conn.execute(
+    insert(UsersRolesORM)
+    .values(user_id=admin_id, role_id=admin_role_id)
+    .on_conflict_do_nothing(index_elements=[UsersRolesORM.user_id, UsersRolesORM.role_id])
+  )
+
+
+async def prewarm_pool(manager: _ConnectionManager, size: int) -> None:
+  """
+  Opens *size* connections at once, so they are returned to the pool ready for first requests
+  """
+  async def touch():
+    async with manager.engine.connect() as conn:
+      await conn.execute(text("SELECT 1"))
+      await barrier.wait()
+
+  barrier = asyncio.Barrier(size)
+
+  await asyncio.gather(*[touch() for _ in range(size)])
+
+
+async def bootstrap(manager: _ConnectionManager, migrate: bool = True, pool_size: int = 0) -> dict[str, float]:
+  """
+  Runs on every API startup and never deletes data:
+
+  - checks (and with *migrate* upgrades) schema
+  - seeds default roles and admin
+
+  Both in one transaction under advisory lock, so several workers can start at once.
+  Then pre-warms *pool_size* connections
+
+  :returns: durations of each step in milliseconds
+  """
+  timings: dict[str, float] = {}
+
+  start = time.perf_counter()
+
+  async with manager.get_conn_ctx() as conn:
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": BOOTSTRAP_LOCK_ID})
+
+    await conn.run_sync(sync_schema, migrate)
+    timings["schema_ms"] = (time.perf_counter() - start) * 1000
+
+    await seed_defaults(conn)
+
+  timings["seed_ms"] = (time.perf_counter() - start) * 1000 - timings["schema_ms"]
+
+  if pool_size > 0:
+    prewarm_start = time.perf_counter()
+    await prewarm_pool(manager, pool_size)
+    timings["prewarm_ms"] = (time.perf_counter() - prewarm_start) * 1000
+
+  timings["total_ms"] = (time.perf_counter() - start) * 1000
+
+  return timings
@@ -13,6 +13,7 @@ class _DBConfig(ConfigModel):
   CONNECTION_POOL_SIZE: int
   CONNECTION_POOL_MAX_SIZE: int
   ORM_ECHO: bool
+  DB_AUTO_MIGRATE: bool = True
 
   ADMIN_EMAIL: str
   ADMIN_PASSWORD: str
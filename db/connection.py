@@ -5,7 +5,7 @@ from fastapi import Depends
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession, AsyncConnection
 
 from db.config import DBConfig
-from db.models import  Base
+from db.metrics import InstrumentedPool, _PoolMetrics
 
 
 class _ConnectionManager:
@@ -17,6 +17,8 @@ class _ConnectionManager:
   :param pool_size: optional number of connections to keep in the connection pool.
 
   :param pool_size: optional number maximum number of connections that can be created above `pool_size`.
+
+  Pool is instrumented, `pool_metrics` holds its checkout wait, connection and usage metrics.
   
   Methods `get_session` and `get_connection` return AsyncSession for DI in endpoints.
 
@@ -34,9 +36,11 @@ class _ConnectionManager:
             url=url,  
             echo=echo, 
             pool_size=pool_size, 
-            max_overflow=max_overflow
+            max_overflow=max_overflow,
+            poolclass=InstrumentedPool
       )
     )
+    self.pool_metrics = _PoolMetrics(self.engine)
     self.session_factory: async_sessionmaker[AsyncSession] = (
       async_sessionmaker(
         bind=self.engine, 
@@ -81,9 +85,3 @@ ConnectionManager = _ConnectionManager(
 )
 
 AsyncSessionDepends = Annotated[AsyncSession, Depends(ConnectionManager.get_session)]
-
-
-async def create_db_tables():
-  async with ConnectionManager.get_conn_ctx() as conn:
-    await conn.run_sync(Base.metadata.drop_all)
-    await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
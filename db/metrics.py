@@ -0,0 +1,93 @@
+import time
+from typing import Iterable
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection, QueuePool
+
+from utils.metrics import Counter, Gauge, Histogram
+
+
+# Pool checkouts are usually sub-millisecond, long tail means pool exhaustion
+CHECKOUT_WAIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+  """
+  Pool events fire only after connection is checked out,
+  so time spent waiting for a free connection is measured around `connect`
+  """
+  metrics: "_PoolMetrics | None" = None
+
+
+  def connect(self) -> PoolProxiedConnection:
+    if self.metrics is None:
+      return super().connect()
+
+    start = time.perf_counter()
+
+    try:
+      return super().connect()
+    except exc.TimeoutError:
+      self.metrics.checkout_timeouts.inc()
+      raise
+    finally:
+      self.metrics.checkout_wait.observe(time.perf_counter() - start)
+
+
+  def recreate(self) -> QueuePool:
+    # `engine.dispose()` replaces the pool
+    pool = super().recreate()
+    pool.metrics = self.metrics # type: ignore
+
+    return pool
+
+
+class _PoolMetrics:
+  """
+  Collects metrics of *engine* pool:
+
+  - checkout wait histogram and timeouts counter from `InstrumentedPool`
+  - created connections counter from `connect` pool event
+  - pool size, checked out, idle and overflow gauges, read only on scrape
+  """
+  def __init__(self, engine: AsyncEngine) -> None:
+    self.engine = engine
+
+    self.checkout_wait = Histogram(
+      "db_pool_checkout_wait_seconds",
+      "Time spent waiting for a connection from the pool",
+      buckets=CHECKOUT_WAIT_BUCKETS
+    )
+    self.checkout_timeouts = Counter(
+      "db_pool_checkout_timeouts_total", "Checkouts failed because the pool stayed exhausted for pool_timeout"
+    )
+    self.connections_created = Counter(
+      "db_pool_connections_created_total", "New database connections opened by the pool"
+    )
+    self.gauges = [
+      Gauge("db_pool_size", "Configured number of persistent connections", lambda: self.pool.size()),
+      Gauge("db_pool_checked_out", "Connections currently in use", lambda: self.pool.checkedout()),
+      Gauge("db_pool_idle", "Connections waiting in the pool", lambda: self.pool.checkedin()),
+      Gauge("db_pool_overflow", "Connections open above pool size", lambda: max(self.pool.overflow(), 0)),
+    ]
+
+    pool = engine.sync_engine.pool
+    assert isinstance(pool, InstrumentedPool)
+    pool.metrics = self
+
+    event.listen(engine.sync_engine, "connect", self.on_connect)
+
+
+  @property
+  def pool(self) -> QueuePool:
+    return self.engine.sync_engine.pool # type: ignore
+
+
+  def on_connect(self, dbapi_connection, connection_record) -> None:
+    self.connections_created.inc()
+
+
+  def collect(self) -> Iterable[str]:
+    for metric in (self.checkout_wait, self.checkout_timeouts, self.connections_created, *self.gauges):
+      yield from metric.collect()
@@ -0,0 +1,11 @@
+
+from utils.models import ConfigModel
+
+
+class _ExportsConfig(ConfigModel):
+
+  #Rows fetched from server-side cursor and encoded per chunk
+  EXPORT_CHUNK_SIZE: int = 1000
+
+
+ExportsConfig = _ExportsConfig() # type: ignore
@@ -0,0 +1,46 @@
+from typing import Any, AsyncGenerator, Sequence
+
+from sqlalchemy import ColumnElement, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from users.models import UsersORM
+from users_roles.models import UsersRolesORM
+
+
+EXPORT_COLUMNS: dict[str, list[ColumnElement]] = {
+  # password hash is never exported
+  "users": [
+    UsersORM.user_id, UsersORM.email, UsersORM.first_name, 
+    UsersORM.last_name, UsersORM.created_at, UsersORM.is_verified
+  ],
+  "users_roles": [UsersRolesORM.id, UsersRolesORM.user_id, UsersRolesORM.role_id, UsersRolesORM.created_at],
+}
+
+
+class ExportsRepository:
+
+  @staticmethod
+  def get_columns(table: str) -> list[str]:
+    return [column.key for column in EXPORT_COLUMNS[table]]
+
+
+  @staticmethod
+  async def stream_rows(
+    engine: AsyncEngine, 
+    table: str, 
+    chunk_size: int
+  ) -> AsyncGenerator[Sequence[Sequence[Any]], None]:
+    """
+    Yields table rows in chunks read from server-side cursor, so memory does not depend on table size.
+
+    Connection is opened here (not taken from request session), because it has to live
+    as long as response is streamed
+    """    
+    columns = EXPORT_COLUMNS[table]
+    query = select(*columns).order_by(columns[0]).execution_options(yield_per=chunk_size)
+
+    async with engine.connect() as conn:
+      result = await conn.stream(query)
+
+      async for partition in result.partitions(chunk_size):
+        yield partition
@@ -0,0 +1,82 @@
+from enum import StrEnum
+from typing import AsyncGenerator
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from auth.dependencies import AdminDependency
+from db.connection import AsyncSessionDepends
+from exports.config import ExportsConfig
+from exports.repository import ExportsRepository
+from exports.utils import encode_csv, encode_ndjson
+from utils.common_responses import authorization_header, token_responses
+
+
+exports_router = APIRouter(prefix="/export", tags=["export"])
+
+
+class ExportTable(StrEnum):
+  USERS = "users"
+  USERS_ROLES = "users_roles"
+
+
+class ExportFormat(StrEnum):
+  NDJSON = "ndjson"
+  CSV = "csv"
+
+
+MEDIA_TYPES = {
+  ExportFormat.NDJSON: "application/x-ndjson",
+  ExportFormat.CSV: "text/csv",
+}
+
+
+async def encode_rows(engine: AsyncEngine, table: ExportTable, format: ExportFormat) -> AsyncGenerator[str, None]:
+  columns = ExportsRepository.get_columns(table)
+
+  if format == ExportFormat.CSV:
+    yield encode_csv([columns])
+
+  async for rows in ExportsRepository.stream_rows(engine, table, ExportsConfig.EXPORT_CHUNK_SIZE):
+    if format == ExportFormat.CSV:
+      yield encode_csv(rows)
+    else:
+      yield encode_ndjson(columns, rows)
+
+
+@exports_router.get('/{table}', dependencies=[AdminDependency],
+  summary="Stream full table dump (only for admin)",
+  openapi_extra={
+    **authorization_header
+  },
+  responses={
+    "200":{
+      "description": "Streams all rows of table as NDJSON (one json object per line) or CSV with header. "
+                     "Users are exported without password",
+      "content": {
+        "application/x-ndjson": {
+          "example": '{"user_id": 1, "email": "some1@mail.ru", "first_name": null, "last_name": null, '
+                     '"created_at": "2025-10-26T17:14:43.648004", "is_verified": true}\n'
+        },
+        "text/csv": {
+          "example": "user_id,email,first_name,last_name,created_at,is_verified\n"
+                     "1,some1@mail.ru,,,2025-10-26T17:14:43.648004,True\n"
+        }
+      },
+    },
+    **token_responses,
+  },
+)
+async def export_table(
+  table: ExportTable, 
+  session: AsyncSessionDepends, 
+  format: ExportFormat = ExportFormat.NDJSON
+) -> StreamingResponse:
+  assert session.bind is not None
+
+  return StreamingResponse(
+    encode_rows(session.bind, table, format),
+    media_type=MEDIA_TYPES[format],
+    headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'},
+  )
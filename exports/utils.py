@@ -0,0 +1,28 @@
+import csv
+from datetime import datetime
+import io
+import json
+from typing import Any, Sequence
+
+
+def to_json_value(value: Any) -> Any:
+  if isinstance(value, datetime):
+    return value.isoformat()
+
+  return value
+
+
+def encode_ndjson(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> str:
+  return "".join(
+    json.dumps({column: to_json_value(value) for column, value in zip(columns, row)}) + "\n"
+    for row in rows
+  )
+
+
+def encode_csv(rows: Sequence[Sequence[Any]]) -> str:
+  buffer = io.StringIO()
+  writer = csv.writer(buffer)
+
+  writer.writerows([[to_json_value(value) for value in row] for row in rows])
+
+  return buffer.getvalue()
@@ -1,44 +1,61 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import time
 
+from fastapi import FastAPI
 
-from roles.repository import RolesRepository
-from users.repository import UsersRepository
+from auth.utils import PasswordHashPool
 from users.router import users_router
 from auth.router import auth_router
-from users_roles.repository import UsersRolesRepository
 from users_roles.router import users_roles_router
+from roles.repository import RolesCatalog
 from roles.router import roles_router
-from db.connection import AsyncSessionDepends, create_db_tables
+from db.bootstrap import bootstrap
+from db.config import DBConfig
+from db.connection import ConnectionManager
 from auto_deletions.router import celery_router
+from exports.router import exports_router
+from metrics.router import metrics_router
+from utils.middlewares import FirstRequestTimer, RequestLatency, RequestTimer
+from utils.utils import pretty_print
 
 
-app = FastAPI()
+PROCESS_STARTED_AT = time.perf_counter()
 
 
-@app.get('/refresh', tags=["danger"], summary="Rebuilds database with one admin user")
-async def refresh_db(session: AsyncSessionDepends):
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Prepares database on startup (migrations, default roles and admin, warm connection pool, roles catalog)
+    and releases all resources on shutdown. It never deletes data, so it is safe on every restart
     """
-    Rebuilds database with one admin user. 
+    timings = await bootstrap(
+        ConnectionManager, 
+        migrate=DBConfig.DB_AUTO_MIGRATE, 
+        pool_size=DBConfig.CONNECTION_POOL_SIZE
+    )
 
-    Be aware of using it. This endpoint deletes all data
+    async with ConnectionManager.get_session_ctx() as session:
+        await RolesCatalog.load(session)
 
-    This is `костыль` for creating project. 
-    I agree that project startup is nasty.
-    """
-    await create_db_tables()
+    timings["startup_ms"] = (time.perf_counter() - PROCESS_STARTED_AT) * 1000
+
+    app.state.startup_timings = timings
+    pretty_print("API BOOTSTRAP ->", ", ".join(f"{key}={value:.1f}" for key, value in timings.items()))
 
-    await RolesRepository.insert_default_roles(session)
+    yield
 
-    resp = await UsersRepository.add_main_admin(session)
+    PasswordHashPool.shutdown()
+    await ConnectionManager.dispose()
 
-    assert resp is not None
 
-    await UsersRolesRepository.add_main_admin_roles(session, resp.user_id)
-    
-    return "API ready for use"
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(FirstRequestTimer, started_at=PROCESS_STARTED_AT)
+app.add_middleware(RequestTimer, histogram=RequestLatency)
 
 app.include_router(auth_router)
 app.include_router(users_router)
 app.include_router(users_roles_router)
 app.include_router(roles_router)
-app.include_router(celery_router)
\ No newline at end of file
+app.include_router(celery_router)
+app.include_router(exports_router)
+app.include_router(metrics_router)
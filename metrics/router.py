@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Response
+
+from db.connection import ConnectionManager
+from utils.metrics import CONTENT_TYPE, render
+from utils.middlewares import RequestLatency
+
+
+metrics_router = APIRouter(tags=["metrics"])
+
+
+@metrics_router.get('/metrics',
+  summary="Prometheus metrics of this API process",
+  responses={
+    "200":{
+      "description": "Request latency histograms by route and connection pool metrics in Prometheus text format",
+      "content": {
+        CONTENT_TYPE: {
+          "example": "# HELP db_pool_checked_out Connections currently in use\n"
+                     "# TYPE db_pool_checked_out gauge\n"
+                     "db_pool_checked_out 1.0\n"
+        }
+      },
+    },
+  },
+)
+async def get_metrics() -> Response:
+  return Response(render([RequestLatency, ConnectionManager.pool_metrics]), media_type=CONTENT_TYPE)
@@ -0,0 +1,71 @@
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from db.config import DBConfig
+from db.models import Base
+
+from auth.verification import models #noqa
+from auto_deletions import models #noqa
+from notifications import models #noqa
+from roles import models #noqa
+from users import models #noqa
+from users_roles import models #noqa
+
+
+config = context.config
+
+if config.config_file_name is not None:
+  fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline() -> None:
+  context.configure(
+    url=config.get_main_option("sqlalchemy.url") or DBConfig.DNS,
+    target_metadata=target_metadata,
+    literal_binds=True,
+    dialect_opts={"paramstyle": "named"},
+  )
+
+  with context.begin_transaction():
+    context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+  context.configure(connection=connection, target_metadata=target_metadata)
+
+  with context.begin_transaction():
+    context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+  engine = create_async_engine(config.get_main_option("sqlalchemy.url") or DBConfig.DNS)
+
+  async with engine.connect() as connection:
+    await connection.run_sync(do_run_migrations)
+
+  await engine.dispose()
+
+
+def run_migrations_online() -> None:
+  """
+  Connection can be passed through `config.attributes["connection"]`
+  (i.e. from tests or app startup that already have running event loop)
+  """  
+  connection = config.attributes.get("connection")
+
+  if connection is None:
+    asyncio.run(run_async_migrations())
+  else:
+    do_run_migrations(connection)
+
+
+if context.is_offline_mode():
+  run_migrations_offline()
+else:
+  run_migrations_online()
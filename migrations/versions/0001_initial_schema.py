@@ -0,0 +1,68 @@
+"""initial schema
+
+Tables that `/refresh` created with `Base.metadata.create_all` before migrations were added:
+users, roles, users_roles and verifications, without indexes other than primary keys and unique constraints
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 10:00:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+CREATED_AT_DEFAULT = sa.text("TIMEZONE('utc', now())")
+
+
+def upgrade() -> None:
+  op.create_table(
+    "users",
+    sa.Column("user_id", sa.Integer(), primary_key=True),
+    sa.Column("email", sa.String(), nullable=False, unique=True),
+    sa.Column("password", sa.String(), nullable=False),
+    sa.Column("first_name", sa.String(), nullable=True),
+    sa.Column("last_name", sa.String(), nullable=True),
+    sa.Column("created_at", sa.DateTime(), server_default=CREATED_AT_DEFAULT, nullable=False),
+    sa.Column("is_verified", sa.Boolean(), server_default=sa.text("FALSE"), nullable=False),
+  )
+
+  op.create_table(
+    "roles",
+    sa.Column("role_id", sa.Integer(), primary_key=True),
+    sa.Column("role", sa.Enum("ADMIN", "USER", name="availableroles"), nullable=False, unique=True),
+  )
+
+  op.create_table(
+    "users_roles",
+    sa.Column("id", sa.Integer(), primary_key=True),
+    sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False),
+    sa.Column("role_id", sa.Integer(), sa.ForeignKey("roles.role_id", ondelete="CASCADE"), nullable=False),
+    sa.Column("created_at", sa.DateTime(), server_default=CREATED_AT_DEFAULT, nullable=False),
+    sa.UniqueConstraint("user_id", "role_id"),
+  )
+
+  op.create_table(
+    "verifications",
+    sa.Column("id", sa.Integer(), primary_key=True),
+    sa.Column(
+      "user_id", sa.Integer(), sa.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, unique=True
+    ),
+    sa.Column("token", sa.String(), nullable=False),
+    sa.Column("expires_at", sa.DateTime(), nullable=False),
+  )
+
+
+def downgrade() -> None:
+  op.drop_table("verifications")
+  op.drop_table("users_roles")
+  op.drop_table("roles")
+  op.drop_table("users")
+  sa.Enum(name="availableroles").drop(op.get_bind(), checkfirst=True)
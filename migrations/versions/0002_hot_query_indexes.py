@@ -0,0 +1,34 @@
+"""indexes for hot queries
+
+- `verifications.token`: `VerificationRepository.get` looks verification up by token
+- `verifications.expires_at`: expired users purge scans by expiration time
+- `users_roles.role_id`: joins with `roles` and `ON DELETE CASCADE` from `roles`.
+  Lookups by `user_id` already use (user_id, role_id) unique index
+
+Indexes are declared on models too
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:05:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+  op.create_index("ix_verifications_token", "verifications", ["token"], unique=True)
+  op.create_index("ix_verifications_expires_at", "verifications", ["expires_at"])
+  op.create_index("ix_users_roles_role_id", "users_roles", ["role_id"])
+
+
+def downgrade() -> None:
+  op.drop_index("ix_users_roles_role_id", table_name="users_roles")
+  op.drop_index("ix_verifications_expires_at", table_name="verifications")
+  op.drop_index("ix_verifications_token", table_name="verifications")
@@ -0,0 +1,45 @@
+"""email outbox
+
+- `email_outbox`: verification emails written in signup transaction and delivered by `deliver_outbox_task`.
+  Worker leases claimed messages until `locked_until`, so it sends them without holding transaction and row locks.
+  `dead_at` is set when message failed `OUTBOX_MAX_ATTEMPTS` times and is not retried anymore
+- `email_outbox (id) WHERE sent_at IS NULL`: outbox delivery claims only pending messages
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 13:30:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+CREATED_AT_DEFAULT = sa.text("TIMEZONE('utc', now())")
+
+
+def upgrade() -> None:
+  op.create_table(
+    "email_outbox",
+    sa.Column("id", sa.Integer(), primary_key=True),
+    sa.Column("recipient", sa.String(), nullable=False),
+    sa.Column("subject", sa.String(), nullable=False),
+    sa.Column("body", sa.String(), nullable=False),
+    sa.Column("attempts", sa.Integer(), server_default=sa.text("0"), nullable=False),
+    sa.Column("created_at", sa.DateTime(), server_default=CREATED_AT_DEFAULT, nullable=False),
+    sa.Column("sent_at", sa.DateTime(), nullable=True),
+    sa.Column("locked_until", sa.DateTime(), nullable=True),
+    sa.Column("dead_at", sa.DateTime(), nullable=True),
+  )
+  op.create_index("ix_email_outbox_pending", "email_outbox", ["id"], postgresql_where=sa.text("sent_at IS NULL"))
+
+
+def downgrade() -> None:
+  op.drop_index("ix_email_outbox_pending", table_name="email_outbox")
+  op.drop_table("email_outbox")
@@ -0,0 +1,30 @@
+"""maintenance leases
+
+- `maintenance_leases`: highest fencing token of each task lock, batches of expired lock holders are rejected
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 14:10:00
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+  op.create_table(
+    "maintenance_leases",
+    sa.Column("name", sa.String(), primary_key=True),
+    sa.Column("token", sa.BigInteger(), nullable=False),
+  )
+
+
+def downgrade() -> None:
+  op.drop_table("maintenance_leases")
@@ -0,0 +1,23 @@
+
+from utils.models import ConfigModel
+
+
+class _NotificationsConfig(ConfigModel):
+
+  #Outbox delivery
+  OUTBOX_BATCH_SIZE: int = 100
+  OUTBOX_MAX_BATCHES_PER_RUN: int = 50
+  OUTBOX_MAX_ATTEMPTS: int = 5
+  OUTBOX_POLL_SECONDS: float = 10
+  # Claimed messages are not claimed by other workers for this long, must exceed time to send a batch
+  OUTBOX_LEASE_SECONDS: float = 60
+  # Failed message waits base * 2 ** (attempts - 1) seconds, at most max, before it is claimed again
+  OUTBOX_RETRY_BASE_SECONDS: float = 30
+  OUTBOX_RETRY_MAX_SECONDS: float = 3600
+
+  #Transport: console | file | memory
+  OUTBOX_TRANSPORT: str = "console"
+  OUTBOX_FILE_PATH: str = "outbox.log"
+
+
+NotificationsConfig = _NotificationsConfig() # type: ignore
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+from sqlalchemy import Index, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db.models import CREATED_AT, INT_PK, Base
+
+
+class OutboxMessage(BaseModel):
+  id: int
+  recipient: str
+  subject: str
+  body: str
+
+
+class BatchMetrics(BaseModel):
+  claimed: int
+  sent: int
+  failed: int
+  # Messages that ran out of attempts in this batch
+  dead: int = 0
+  seconds: float
+
+  @property
+  def messages_per_second(self) -> float:
+    if self.seconds <= 0:
+      return 0.0
+
+    return self.sent / self.seconds
+
+
+class OutboxORM(Base):
+  """
+  Messages are written in the same transaction as the data they are about,
+  and delivered later by celery task `deliver_outbox_task`.
+  Pending message has neither `sent_at` nor `dead_at`
+  """
+  
+  __tablename__ = "email_outbox"
+
+  id: Mapped[INT_PK]
+  recipient: Mapped[str]
+  subject: Mapped[str]
+  body: Mapped[str]
+  attempts: Mapped[int] = mapped_column(server_default=text("0"))
+  created_at: Mapped[CREATED_AT]
+  sent_at: Mapped[datetime | None]
+  # Claimed by delivery worker until this time
+  locked_until: Mapped[datetime | None]
+  # Gave up after `OUTBOX_MAX_ATTEMPTS` failed attempts
+  dead_at: Mapped[datetime | None]
+
+  __table_args__ = (Index("ix_email_outbox_pending", "id", postgresql_where=text("sent_at IS NULL")), )
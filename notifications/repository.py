@@ -0,0 +1,113 @@
+from datetime import timedelta
+import time
+
+from sqlalchemy import case, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from notifications.config import NotificationsConfig
+from notifications.models import BatchMetrics, OutboxMessage, OutboxORM
+from notifications.transport import Transport
+from utils.serialization import validate_rows
+
+
+class OutboxRepository:
+
+  @staticmethod
+  async def deliver_batch(
+    session: AsyncSession, 
+    transport: Transport, 
+    batch_size: int, 
+    max_attempts: int,
+    lease_seconds: float = NotificationsConfig.OUTBOX_LEASE_SECONDS,
+    retry_base_seconds: float = NotificationsConfig.OUTBOX_RETRY_BASE_SECONDS,
+    retry_max_seconds: float = NotificationsConfig.OUTBOX_RETRY_MAX_SECONDS
+  ) -> BatchMetrics:
+    """
+    Delivers up to *batch_size* pending messages in three steps, so no transaction
+    or row lock is held while *transport* sends:
+
+    - claims messages with `FOR UPDATE SKIP LOCKED`, leases them for *lease_seconds*,
+      counts the attempt and commits. Other workers skip leased messages
+    - sends them through *transport*
+    - records sent and failed messages in one more transaction
+
+    Failed message stays leased for exponential backoff: *retry_base_seconds* doubled with every attempt,
+    at most *retry_max_seconds*, so short transport outage does not burn all attempts in one run.
+    Message that failed *max_attempts* times is marked dead and is not claimed anymore.
+    Message whose lease expired (i.e. worker crashed while sending) is claimed again
+    """    
+    start = time.perf_counter()
+
+    now = func.timezone("utc", func.now())
+    pending = (OutboxORM.sent_at.is_(None), OutboxORM.dead_at.is_(None))
+
+    # Last attempt leased, but never recorded
+    expired = await session.scalars(
+      update(OutboxORM)
+      .filter(*pending, OutboxORM.attempts >= max_attempts, OutboxORM.locked_until < now)
+      .values(dead_at=now, locked_until=None)
+      .returning(OutboxORM.id)
+    )
+    dead = len(expired.all())
+
+    claimed = (
+      select(OutboxORM.id)
+      .filter(*pending, OutboxORM.attempts < max_attempts)
+      .filter(or_(OutboxORM.locked_until.is_(None), OutboxORM.locked_until < now))
+      .order_by(OutboxORM.id)
+      .limit(batch_size)
+      .with_for_update(skip_locked=True)
+    )
+
+    rows = (await session.execute(
+      update(OutboxORM)
+      .filter(OutboxORM.id.in_(claimed.scalar_subquery()))
+      .values(locked_until=now + timedelta(seconds=lease_seconds), attempts=OutboxORM.attempts + 1)
+      .returning(OutboxORM.id, OutboxORM.recipient, OutboxORM.subject, OutboxORM.body)
+    )).all()
+
+    await session.commit()
+
+    sent_ids: list[int] = []
+    failed_ids: list[int] = []
+
+    for message in validate_rows(OutboxMessage, rows):
+      try:
+        await transport.send(message)
+        sent_ids.append(message.id)
+      except Exception as e:
+        print(f"Error sending outbox message {message.id}: {str(e)}")
+        failed_ids.append(message.id)
+
+    if sent_ids:
+      await session.execute(
+        update(OutboxORM).filter(OutboxORM.id.in_(sent_ids)).values(sent_at=now, locked_until=None)
+      )
+
+    if failed_ids:
+      backoff = func.least(
+        timedelta(seconds=retry_base_seconds) * func.power(2, OutboxORM.attempts - 1),
+        timedelta(seconds=retry_max_seconds)
+      )
+      is_dead = OutboxORM.attempts >= max_attempts
+
+      failed = await session.scalars(
+        update(OutboxORM)
+        .filter(OutboxORM.id.in_(failed_ids))
+        .values(
+          locked_until=case((is_dead, None), else_=now + backoff),
+          dead_at=case((is_dead, now), else_=None)
+        )
+        .returning(OutboxORM.dead_at)
+      )
+      dead += sum(dead_at is not None for dead_at in failed)
+
+    await session.commit()
+
+    return BatchMetrics(
+      claimed=len(rows), 
+      sent=len(sent_ids), 
+      failed=len(failed_ids), 
+      dead=dead,
+      seconds=time.perf_counter() - start
+    )
@@ -0,0 +1,51 @@
+from typing import Protocol
+
+from notifications.config import NotificationsConfig
+from notifications.models import OutboxMessage
+from utils.utils import pretty_print
+
+
+class Transport(Protocol):
+  """
+  Delivers one outbox message. Any raised exception marks message as failed, so it is retried later
+  """  
+  async def send(self, message: OutboxMessage) -> None: ...
+
+
+class ConsoleTransport:
+
+  async def send(self, message: OutboxMessage) -> None:
+    pretty_print(f"TO: {message.recipient} | {message.subject} ->", message.body, sep_cnt=30)
+
+
+class FileTransport:
+
+  def __init__(self, path: str) -> None:
+    self.path = path
+
+
+  async def send(self, message: OutboxMessage) -> None:
+    with open(self.path, "a") as f:
+      f.write(f"{message.id}\t{message.recipient}\t{message.subject}\t{message.body}\n")
+
+
+class InMemoryTransport:
+
+  def __init__(self) -> None:
+    self.sent: list[OutboxMessage] = []
+
+
+  async def send(self, message: OutboxMessage) -> None:
+    self.sent.append(message)
+
+
+def get_transport(name: str = NotificationsConfig.OUTBOX_TRANSPORT) -> Transport:
+  match name:
+    case "console":
+      return ConsoleTransport()
+    case "file":
+      return FileTransport(NotificationsConfig.OUTBOX_FILE_PATH)
+    case "memory":
+      return InMemoryTransport()
+    case _:
+      raise ValueError(f"unknown outbox transport {name}")
@@ -0,0 +1,10 @@
+from utils.models import ConfigModel
+
+
+class _RolesConfig(ConfigModel):
+
+  #In-process roles catalog is reloaded after this time (roles are changed only by migrations and seeding)
+  ROLES_CATALOG_TTL_SECONDS: float = 300
+
+
+RolesConfig = _RolesConfig() # type: ignore
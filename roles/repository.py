@@ -1,40 +1,100 @@
+import asyncio
+import time
+
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from roles.models import AvailableRoles, OKResponce, Role, RolesORM
+from roles.config import RolesConfig
+from roles.models import AvailableRoles, Role, RolesORM
+from utils.serialization import validate_rows
 
 
 class RolesRepository:
 
   @staticmethod
   async def get_roles(session: AsyncSession) -> list[Role] | None:
-    query = select(RolesORM)
+    query = select(RolesORM.role_id, RolesORM.role)
 
-    res = await session.scalars(query)
+    res = await session.execute(query)
     result = res.all()
     
     if not result:
       return None
 
-    return [Role.model_validate(role, from_attributes=True) for role in result]
+    return validate_rows(Role, result)
 
 
-  @staticmethod
-  async def insert_default_roles(session: AsyncSession) -> None:
+class _RolesCatalog:
+  """
+  In-process copy of tiny `roles` table. It is loaded on API startup and reloaded 
+  when *ttl* passed, on `invalidate()` or when requested role is missing.
+  Missing role is remembered until *ttl* passes, so it does not hit database on every call.
+
+  Concurrent stale lookups wait for one reload instead of each reloading
+  """
+  def __init__(self, ttl: float) -> None:
+    self.ttl = ttl
+    self.roles: list[Role] = []
+    self.ids: dict[str, int] = {}
+    self.missing: set[str] = set()
+    self.loaded_at: float | None = None
+    self.lock = asyncio.Lock()
+
+
+  def is_fresh(self) -> bool:
+    return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl
+
+
+  def is_known(self, role: str) -> bool:
+    return self.is_fresh() and (role in self.ids or role in self.missing)
+
+
+  async def fetch(self, session: AsyncSession) -> list[Role]:
     """
-    Method creates in DB available roles
+    Reloads catalog, caller must hold `lock`
     """    
-    session.add_all([RolesORM(role=role) for role in AvailableRoles])
-    await session.commit()
+    roles = await RolesRepository.get_roles(session) or []
 
+    self.roles = roles
+    self.ids = {role.role: role.role_id for role in roles}
+    self.missing = set()
+    self.loaded_at = time.monotonic() if roles else None
 
-  @staticmethod
-  async def get_role(session: AsyncSession, role: AvailableRoles) -> OKResponce | None:
-    query = select(RolesORM.role_id).filter_by(role=role)
+    return roles
 
-    result = await session.scalar(query)
 
-    if not result:
-      return None
+  async def load(self, session: AsyncSession) -> list[Role]:
+    async with self.lock:
+      return await self.fetch(session)
+
+
+  async def get_roles(self, session: AsyncSession) -> list[Role]:
+    if self.is_fresh():
+      return self.roles
+
+    async with self.lock:
+      if not self.is_fresh():
+        await self.fetch(session)
+
+      return self.roles
+
+
+  async def get_role_id(self, session: AsyncSession, role: AvailableRoles) -> int | None:
+    if self.is_known(role):
+      return self.ids.get(role)
+
+    async with self.lock:
+      if not self.is_known(role):
+        await self.fetch(session)
+
+        if role not in self.ids:
+          self.missing.add(role)
+
+      return self.ids.get(role)
+
+
+  def invalidate(self) -> None:
+    self.loaded_at = None
+
 
-    return OKResponce(ok=True, role_id=result)
\ No newline at end of file
+RolesCatalog = _RolesCatalog(ttl=RolesConfig.ROLES_CATALOG_TTL_SECONDS)
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, status, HTTPException
+from fastapi import APIRouter, Request, Response, status, HTTPException
 
 from auth.dependencies import AdminDependency
 from db.connection import AsyncSessionDepends
 from roles.models import Role
-from roles.repository import RolesRepository
-from utils.common_responses import authorization_header, token_responses
+from roles.repository import RolesCatalog
+from utils.common_responses import authorization_header, not_modified_responce, token_responses
+from utils.etag import check_etag
 
 
 roles_router = APIRouter(prefix="/roles", tags=["roles"])
@@ -35,6 +36,7 @@ roles_router = APIRouter(prefix="/roles", tags=["roles"])
       },
     },
     **token_responses,
+    **not_modified_responce,
     "404": {
     "description": "Not found error",
     "content": {
@@ -45,10 +47,12 @@ roles_router = APIRouter(prefix="/roles", tags=["roles"])
   },
   },
 )
-async def get_all_roles(session: AsyncSessionDepends)->list[Role]:
-  result = await RolesRepository.get_roles(session)
+async def get_all_roles(session: AsyncSessionDepends, request: Request, response: Response)->list[Role]:
+  result = await RolesCatalog.get_roles(session)
 
-  if result is None:
+  if not result:
     raise HTTPException(detail=f"roles not found", status_code=status.HTTP_404_NOT_FOUND)
 
+  check_etag(request, response, result, "private, max-age=60")
+
   return result
\ No newline at end of file
@@ -0,0 +1,39 @@
+from functools import lru_cache
+from typing import Iterable
+
+from roles.models import AvailableRoles
+
+
+# Bit of each role is its position in `AvailableRoles`, so new roles must be appended to the end
+ROLE_BITS: dict[str, int] = {role.value: 1 << index for index, role in enumerate(AvailableRoles)}
+
+
+def roles_to_mask(roles: Iterable[str], strict: bool = False) -> int:
+  """
+  Packs role names to integer bitmask. Unknown roles are skipped, with `strict` they raise KeyError
+  """  
+  mask = 0
+
+  for role in roles:
+    bit = ROLE_BITS[role] if strict else ROLE_BITS.get(role, 0)
+    mask |= bit
+
+  return mask
+
+
+@lru_cache(maxsize=None)
+def required_mask(roles: tuple[str, ...]) -> int:
+  """
+  Bitmask of roles required by security dependency, computed once per distinct scopes.
+  Unknown roles raise KeyError
+  """
+  return roles_to_mask(roles, strict=True)
+
+
+@lru_cache(maxsize=None)
+def mask_to_roles(mask: int) -> tuple[str, ...]:
+  return tuple(role for role, bit in ROLE_BITS.items() if mask & bit)
+
+
+def has_roles(mask: int, required_mask: int) -> bool:
+  return mask & required_mask == required_mask
@@ -0,0 +1,13 @@
+-- DROP table if EXISTS email_outbox;
+create table
+  if not exists email_outbox (
+    id serial primary key,
+    recipient varchar not null,
+    subject varchar not null,
+    body varchar not null,
+    attempts int not null default 0,
+    created_at timestamp not null DEFAULT TIMEZONE('utc', now ()),
+    sent_at timestamp,
+    locked_until timestamp,
+    dead_at timestamp
+  );
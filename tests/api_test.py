@@ -1,17 +1,29 @@
+import json
+
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
 from fastapi.testclient import TestClient
 from fastapi import HTTPException, status
 from httpx import ASGITransport, AsyncClient
 import pytest_asyncio
 import pytest
 
+from db.bootstrap import seed_defaults
 from db.connection import _ConnectionManager, ConnectionManager
 from roles.models import AvailableRoles
-from roles.repository import RolesRepository
+from roles.repository import RolesCatalog
 from tests.module_test import conn_manager #noqa
+from auth.router import auth_router
+from auth.utils import create_access_token
+from auto_deletions.router import celery_router
 from main import app
+from roles.router import roles_router
 from users.repository import UsersRepository
+from users.router import users_router
 from users_roles.models import RegisterUserRole
 from users_roles.repository import UsersRolesRepository
+from users_roles.router import users_roles_router
 
 
 client = TestClient(app)
@@ -26,8 +38,9 @@ async def dependencies_overrider(conn_manager: _ConnectionManager):
 
   app.dependency_overrides[ConnectionManager.get_session] = override_session_dependency
 
-  async with conn_manager.get_session_ctx() as session:
-      await RolesRepository.insert_default_roles(session)
+  # Same seeding as API startup: default roles and admin from config
+  async with conn_manager.get_conn_ctx() as conn:
+    await seed_defaults(conn)
 
   yield
 
@@ -42,7 +55,7 @@ async def client_getter(dependencies_overrider):
 
 @pytest.mark.asyncio
 @pytest.mark.parametrize("email,password, status_code", [
-  ("admin@mail.ru", "qwerty", status.HTTP_200_OK),
+  ("admin@mail.ru", "qwerty", status.HTTP_400_BAD_REQUEST),
   ("user@mail.ru", "qwerty", status.HTTP_200_OK),
   ("user@mail.ru", "qwerty", status.HTTP_400_BAD_REQUEST),
 ])
@@ -72,7 +85,8 @@ async def test_login(client_getter: AsyncClient, email: str, password: str, stat
 
 @pytest.mark.asyncio
 @pytest.mark.parametrize("email,is_admin,status_code", [
-  ("admin@mail.ru", True, status.HTTP_200_OK),
+  ("admin@mail.ru", True, status.HTTP_400_BAD_REQUEST),
+  ("admin@mail.ru", False, status.HTTP_200_OK),
   ("user@mail.ru", False, status.HTTP_400_BAD_REQUEST),
 ])
 async def test_users_roles_add(
@@ -83,15 +97,15 @@ async def test_users_roles_add(
   status_code: int
 ):
   async with conn_manager.get_session_ctx() as session:
-    resp = await RolesRepository.get_role(session, AvailableRoles.ADMIN if is_admin else AvailableRoles.USER)
+    role_id = await RolesCatalog.get_role_id(session, AvailableRoles.ADMIN if is_admin else AvailableRoles.USER)
 
-    assert resp is not None
+    assert role_id is not None
 
     user = await UsersRepository.get_user(session, email=email)
 
     assert user is not None
 
-    registerUserRole = RegisterUserRole(user_id=user.user_id, role_id=resp.role_id)
+    registerUserRole = RegisterUserRole(user_id=user.user_id, role_id=role_id)
 
     try:
       resp = await UsersRolesRepository.add(session, registerUserRole)
@@ -128,4 +142,220 @@ async def test_get_all_users(
 
   resp = await client_getter.get("/users", headers=headers)
 
-  assert resp.status_code == get_user_status_code
\ No newline at end of file
+  assert resp.status_code == get_user_status_code
+
+@pytest.mark.asyncio
+async def test_get_all_users_pagination(client_getter: AsyncClient):
+  resp = await client_getter.post("/auth/login", json=dict(email="admin@mail.ru", password="qwerty"))
+
+  headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+  user_ids = []
+  cursor = None
+
+  while True:
+    params = {"limit": 1} if cursor is None else {"limit": 1, "cursor": cursor}
+    resp = await client_getter.get("/users", headers=headers, params=params)
+
+    assert resp.status_code == status.HTTP_200_OK
+
+    page = resp.json()
+    assert len(page["items"]) <= 1
+
+    user_ids.extend(user["user_id"] for user in page["items"])
+    cursor = page["next_cursor"]
+
+    if cursor is None:
+      break
+
+  assert len(user_ids) == 2
+  assert user_ids == sorted(user_ids)
+
+  resp = await client_getter.get("/users", headers=headers, params={"cursor": "garbage"})
+
+  assert resp.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("email,table,format,status_code", [
+  ("admin@mail.ru", "users", "ndjson", status.HTTP_200_OK),
+  ("admin@mail.ru", "users_roles", "csv", status.HTTP_200_OK),
+  ("admin@mail.ru", "verifications", "csv", status.HTTP_422_UNPROCESSABLE_ENTITY),
+  ("user@mail.ru", "users", "ndjson", status.HTTP_401_UNAUTHORIZED),
+])
+async def test_export_table(client_getter: AsyncClient, email: str, table: str, format: str, status_code: int):
+  resp = await client_getter.post("/auth/login", json=dict(email=email, password="qwerty"))
+
+  headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+  async with client_getter.stream("GET", f"/export/{table}", headers=headers, params={"format": format}) as resp:
+    assert resp.status_code == status_code
+
+    if status_code != status.HTTP_200_OK:
+      return
+
+    lines = [line async for line in resp.aiter_lines() if line]
+
+  if format == "csv":
+    assert lines[0].startswith("id,user_id,role_id")
+    assert len(lines) > 1
+  else:
+    users = [json.loads(line) for line in lines]
+
+    assert len(users) == 2
+    assert all("password" not in user for user in users)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("url,fields,want_keys,status_code", [
+  ("/users/me", None, {"user_id", "email", "first_name", "last_name", "created_at", "is_verified"}, status.HTTP_200_OK),
+  ("/users/me", "email, first_name", {"email", "first_name"}, status.HTTP_200_OK),
+  ("/users/me", "password", None, status.HTTP_400_BAD_REQUEST),
+  ("/users/1", "email", {"email"}, status.HTTP_200_OK),
+  ("/users", "email", {"email"}, status.HTTP_200_OK),
+])
+async def test_get_users_fields(
+  client_getter: AsyncClient, 
+  url: str, 
+  fields: str | None, 
+  want_keys: set[str] | None, 
+  status_code: int
+):
+  resp = await client_getter.post("/auth/login", json=dict(email="admin@mail.ru", password="qwerty"))
+
+  headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+  resp = await client_getter.get(url, headers=headers, params={} if fields is None else {"fields": fields})
+
+  assert resp.status_code == status_code
+
+  if want_keys is None:
+    return
+
+  body = resp.json()
+  users = body["items"] if "items" in body else [body]
+
+  assert users
+  assert all(user.keys() == want_keys for user in users)
+
+
+@pytest.mark.parametrize("router", [auth_router, users_router, users_roles_router, roles_router, celery_router])
+def test_json_routes_use_fast_serialization(router):
+  """
+  FastAPI dumps responce straight to JSON bytes in pydantic-core only when route has return type
+  and no custom `response_class`, otherwise it goes through python dicts and `json.dumps`
+  """
+  assert isinstance(app.router.default_response_class, DefaultPlaceholder)
+
+  for route in router.routes:
+    assert isinstance(route, APIRoute)
+    assert route.response_field is not None, route.path
+    assert isinstance(route.response_class, DefaultPlaceholder), route.path
+
+
+def test_fast_serialization_output_matches_json_response():
+  route = next(route for route in users_router.routes if isinstance(route, APIRoute) and route.path == "/users/")
+  assert route.response_field is not None
+
+  page = {
+    "items": [{"user_id": 1, "email": "a@mail.ru", "first_name": "Имя", "created_at": "2025-10-26T17:14:43.648004"}],
+    "next_cursor": None
+  }
+
+  value, errors = route.response_field.validate(page, {}, loc=("response",))
+  assert not errors
+
+  dumped = route.response_field.serialize(value, exclude_unset=True)
+
+  assert route.response_field.serialize_json(value, exclude_unset=True) == JSONResponse(dumped).body
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("url", ["/users/me", "/roles", "/usersroles/1"])
+async def test_conditional_get(client_getter: AsyncClient, url: str):
+  resp = await client_getter.post("/auth/login", json=dict(email="admin@mail.ru", password="qwerty"))
+
+  headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+  resp = await client_getter.get(url, headers=headers)
+
+  assert resp.status_code == status.HTTP_200_OK
+  etag = resp.headers["etag"]
+  assert etag.startswith('W/"')
+  assert "private" in resp.headers["cache-control"]
+
+  resp = await client_getter.get(url, headers={**headers, "If-None-Match": etag})
+
+  assert resp.status_code == status.HTTP_304_NOT_MODIFIED
+  assert resp.content == b""
+  assert resp.headers["etag"] == etag
+
+  resp = await client_getter.get(url, headers={**headers, "If-None-Match": 'W/"stale"'})
+
+  assert resp.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_bulk_grant_and_revoke_roles(client_getter: AsyncClient):
+  resp = await client_getter.post("/auth/login", json=dict(email="admin@mail.ru", password="qwerty"))
+
+  headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+  pairs = [{"user_id": 1, "role_id": 1}, {"user_id": 999, "role_id": 1}]
+
+  resp = await client_getter.post("/usersroles/bulk/grant", headers=headers, json={"pairs": pairs})
+
+  assert resp.status_code == status.HTTP_200_OK
+  assert [el["outcome"] for el in resp.json()["results"]] == ["already_granted", "invalid"]
+
+  resp = await client_getter.post("/usersroles/bulk/revoke", headers=headers, json={"pairs": pairs[1:]})
+
+  assert resp.status_code == status.HTTP_200_OK
+  assert resp.json()["counts"] == {"not_granted": 1}
+
+  for pairs in (
+    [{"user_id": 1, "role_id": 1}] * 10_001,
+    [{"user_id": 2**31, "role_id": 1}],
+    [{"user_id": 1, "role_id": 0}],
+  ):
+    resp = await client_getter.post("/usersroles/bulk/grant", headers=headers, json={"pairs": pairs})
+
+    assert resp.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+  resp = await client_getter.post("/usersroles/bulk/revoke", headers=headers, json={"pairs": [{"user_id": 2**31 - 1, "role_id": 1}]})
+
+  assert resp.status_code == status.HTTP_200_OK
+  assert resp.json()["counts"] == {"not_granted": 1}
+
+
+@pytest.mark.asyncio
+async def test_metrics(client_getter: AsyncClient):
+  await client_getter.post("/auth/login", json=dict(email="admin@mail.ru", password="qwerty"))
+  await client_getter.get("/no/such/path")
+
+  resp = await client_getter.get("/metrics")
+
+  assert resp.status_code == status.HTTP_200_OK
+  assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+  lines = resp.text.splitlines()
+
+  assert any(line.startswith('http_request_duration_seconds_count{method="POST",route="/auth/login",status="200"}') for line in lines)
+  assert any(line.startswith('http_request_duration_seconds_count{method="GET",route="unmatched",status="404"}') for line in lines)
+  assert "# TYPE db_pool_checkout_wait_seconds histogram" in lines
+  assert "# TYPE db_pool_checked_out gauge" in lines
+  assert any(line.startswith("db_pool_connections_created_total ") for line in lines)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("roles,status_code", [
+  ("admin user", status.HTTP_200_OK),
+  ("user", status.HTTP_401_UNAUTHORIZED),
+  ("admin superadmin", status.HTTP_401_UNAUTHORIZED),
+])
+async def test_legacy_roles_token(client_getter: AsyncClient, roles: str, status_code: int):
+  token = create_access_token({"user_id": 1, "roles": roles})
+
+  resp = await client_getter.get("/usersroles/1", headers={"Authorization": f"Bearer {token}"})
+
+  assert resp.status_code == status_code
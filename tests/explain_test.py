@@ -0,0 +1,172 @@
+
+from typing import Any
+
+from alembic import command
+from alembic.config import Config
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, text
+from sqlalchemy.engine import Connection
+
+from auto_deletions.locks import Lease
+from auto_deletions.repository import PurgeRepository
+from auth.verification.repository import VerificationRepository
+from db.config import _DBConfig
+from db.connection import _ConnectionManager
+from notifications.repository import OutboxRepository
+from notifications.transport import InMemoryTransport
+from users.repository import UsersRepository
+from users_roles.models import RegisterUserRole
+from users_roles.repository import UsersRolesRepository
+from utils.pagination import PageParams
+
+
+DBConfig = _DBConfig(_env_file=".env.test") #type: ignore
+
+SEED_USERS = 50_000
+
+# Tiny lookup tables that are always cheaper to scan
+SEQ_SCAN_ALLOWED = {"roles", "alembic_version"}
+
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+
+def run_alembic(connection: Connection, revision: str) -> None:
+  config = Config("alembic.ini")
+  config.attributes["connection"] = connection
+
+  if revision == "base":
+    command.downgrade(config, revision)
+  else:
+    command.upgrade(config, revision)
+
+
+SEED_SQL = [
+  """
+  INSERT INTO roles (role) VALUES ('ADMIN'), ('USER')
+  """,
+  f"""
+  INSERT INTO users (email, password, first_name)
+  SELECT 'user' || i || '@mail.com', 'password_hash', 'name' || i FROM generate_series(1, {SEED_USERS}) AS i
+  """,
+  """
+  INSERT INTO users_roles (user_id, role_id) SELECT user_id, 2 FROM users
+  """,
+  """
+  INSERT INTO verifications (user_id, token, expires_at)
+  SELECT user_id, 'token' || user_id, TIMEZONE('utc', now()) + (user_id % 1000 - 1) * interval '1 day'
+  FROM users
+  """,
+  """
+  INSERT INTO email_outbox (recipient, subject, body, sent_at)
+  SELECT email, 'subject', 'body', CASE WHEN user_id % 100 = 0 THEN NULL ELSE now() END FROM users
+  """,
+  "ANALYZE",
+]
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def seeded_manager():
+  connectionManager = _ConnectionManager(url=DBConfig.DNS)
+
+  async with connectionManager.get_conn_ctx() as conn:
+    await conn.run_sync(run_alembic, "head")
+
+  async with connectionManager.engine.connect() as conn:
+    await conn.execution_options(isolation_level="AUTOCOMMIT")
+
+    for sql in SEED_SQL:
+      await conn.execute(text(sql))
+
+  yield connectionManager
+
+  async with connectionManager.get_conn_ctx() as conn:
+    await conn.run_sync(run_alembic, "base")
+
+  await connectionManager.dispose()
+
+
+def find_seq_scans(plan: dict[str, Any]) -> list[str]:
+  relations = []
+
+  if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") not in SEQ_SCAN_ALLOWED:
+    relations.append(plan["Relation Name"])
+
+  for child in plan.get("Plans", []):
+    relations.extend(find_seq_scans(child))
+
+  return relations
+
+
+async def assert_no_seq_scans(manager: _ConnectionManager, call) -> None:
+  """
+  Runs repository *call*, captures every statement it sends and runs `EXPLAIN` on each of them
+  """
+  statements: list[tuple[str, Any]] = []
+
+  def capture(conn, cursor, statement, parameters, context, executemany):
+    statements.append((statement, parameters))
+
+  event.listen(manager.engine.sync_engine, "before_cursor_execute", capture)
+
+  try:
+    async with manager.get_session_ctx() as session:
+      await call(session)
+  finally:
+    event.remove(manager.engine.sync_engine, "before_cursor_execute", capture)
+
+  assert statements
+
+  async with manager.engine.connect() as conn:
+    for statement, parameters in statements:
+      result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+      plan = result.scalar_one()[0]["Plan"]
+
+      assert find_seq_scans(plan) == [], statement
+
+    await conn.rollback()
+
+
+@pytest.mark.parametrize("call", [
+  pytest.param(lambda session: UsersRepository.get_user(session, user_id=42), id="get_user by user_id"),
+  pytest.param(lambda session: UsersRepository.get_user(session, email="user42@mail.com"), id="get_user by email"),
+  pytest.param(
+    lambda session: UsersRepository.get_public_user(session, ("email",), user_id=42), id="get_public_user projection"
+  ),
+  pytest.param(lambda session: UsersRepository.get_credentials(session, email="user42@mail.com"), id="get_credentials"),
+  pytest.param(lambda session: UsersRolesRepository.get_roles_by(session, 42), id="get_roles_by"),
+  pytest.param(
+    lambda session: UsersRepository.get_users(session, PageParams(limit=100, after=40_000)), id="get_users deep page"
+  ),
+  pytest.param(
+    lambda session: UsersRolesRepository.get_all(session, PageParams(limit=100, after=40_000)), id="get_all users_roles deep page"
+  ),
+  pytest.param(
+    lambda session: UsersRolesRepository.grant_many(
+      session, [RegisterUserRole(user_id=user_id, role_id=1) for user_id in range(100, 200)]
+    ), 
+    id="bulk grant"
+  ),
+  pytest.param(
+    lambda session: UsersRolesRepository.revoke_many(
+      session, [RegisterUserRole(user_id=user_id, role_id=2) for user_id in range(100, 200)]
+    ), 
+    id="bulk revoke"
+  ),
+  pytest.param(lambda session: VerificationRepository.get(session, "token42"), id="verification get"),
+  pytest.param(lambda session: VerificationRepository.get_expired_users(session), id="get_expired_users"),
+  pytest.param(lambda session: PurgeRepository.purge_expired_users_batch(session, 100), id="purge_expired_users_batch"),
+  pytest.param(
+    lambda session: PurgeRepository.purge_expired_users_batch(session, 100, Lease("purge_expired_users", "owner", 1)),
+    id="fenced purge_expired_users_batch"
+  ),
+  pytest.param(lambda session: UsersRepository.verify_user(session, 43), id="verify_user"),
+  pytest.param(lambda session: UsersRepository.delete_user(session, 44), id="delete_user"),
+  pytest.param(lambda session: UsersRepository.verify_user_by_token(session, "token45"), id="verify_user_by_token"),
+  pytest.param(
+    lambda session: OutboxRepository.deliver_batch(session, InMemoryTransport(), batch_size=10, max_attempts=5),
+    id="outbox deliver_batch"
+  ),
+])
+async def test_repository_queries_use_indexes(seeded_manager: _ConnectionManager, call):
+  await assert_no_seq_scans(seeded_manager, call)
@@ -1,24 +1,88 @@
 
 
+import asyncio
+from contextlib import contextmanager
+from datetime import timedelta
 from dataclasses import dataclass
+import time
+import uuid
 from pydantic import BaseModel
+from fastapi import HTTPException, status
 import pytest
 import pytest_asyncio
-from sqlalchemy import text
+import redis
+from sqlalchemy import event, func, insert, inspect, select, text, update
 
+from auto_deletions import models #noqa
+from auto_deletions.config import Config
+from auto_deletions.locks import Lease, LockLostError, RedisLockBackend
+from auto_deletions.models import MaintenanceLeasesORM
+from auto_deletions.repository import PurgeRepository
+from auto_deletions.worker import _WorkerRuntime
+from db.bootstrap import bootstrap, seed_defaults, sync_schema
 from db.config import _DBConfig
 from db.connection import _ConnectionManager
 from db.models import Base
 
 from roles import models #noqa
-from users.models import OKResponce, RegisterUser
+from roles.models import AvailableRoles, RolesORM
+from roles.repository import RolesCatalog, RolesRepository, _RolesCatalog
+from notifications.models import OutboxMessage, OutboxORM
+from notifications.repository import OutboxRepository
+from notifications.transport import InMemoryTransport
+from users.models import OKResponce, RegisterUser, UpdateUser, UsersORM
+from users import repository as users_repository
 from users.repository import UsersRepository
 from users_roles import models #noqa
+from users_roles.models import BulkOutcome, RegisterUserRole
+from users_roles.repository import UsersRolesRepository
 from auth.verification import models #noqa
+from notifications import models #noqa
+from auth.utils import hash_password_async, verify_password
+from auth.verification.repository import VerificationRepository
 
 
 DBConfig = _DBConfig(_env_file=".env.test") #type: ignore
 
+# Schema that `/refresh` created with `Base.metadata.create_all` before migrations were added
+PRE_MIGRATIONS_SCHEMA = [
+  "CREATE TYPE availableroles AS ENUM ('ADMIN', 'USER')",
+  """
+  CREATE TABLE roles (
+    role_id SERIAL PRIMARY KEY,
+    role availableroles NOT NULL UNIQUE
+  )
+  """,
+  """
+  CREATE TABLE users (
+    user_id SERIAL PRIMARY KEY,
+    email VARCHAR NOT NULL UNIQUE,
+    password VARCHAR NOT NULL,
+    first_name VARCHAR,
+    last_name VARCHAR,
+    created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT TIMEZONE('utc', now()) NOT NULL,
+    is_verified BOOLEAN DEFAULT FALSE NOT NULL
+  )
+  """,
+  """
+  CREATE TABLE users_roles (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (user_id) ON DELETE CASCADE,
+    role_id INTEGER NOT NULL REFERENCES roles (role_id) ON DELETE CASCADE,
+    created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT TIMEZONE('utc', now()) NOT NULL,
+    UNIQUE (user_id, role_id)
+  )
+  """,
+  """
+  CREATE TABLE verifications (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL UNIQUE REFERENCES users (user_id) ON DELETE CASCADE,
+    token VARCHAR NOT NULL,
+    expires_at TIMESTAMP WITHOUT TIME ZONE NOT NULL
+  )
+  """,
+]
+
 
 @pytest_asyncio.fixture(scope="session")
 async def conn_manager():
@@ -33,6 +97,8 @@ async def conn_manager():
   connectionManager.engine.echo = False
   async with connectionManager.get_conn_ctx() as conn:
     await conn.run_sync(Base.metadata.create_all)
+    # API startup seeds them in every database, signup takes default role from them
+    await conn.execute(insert(RolesORM).values([{"role": role} for role in AvailableRoles]))
   
   yield connectionManager
   
@@ -44,6 +110,24 @@ async def conn_manager():
   print("deleting database")
 
 
+@contextmanager
+def count_statements(conn_manager: _ConnectionManager):
+  """
+  Collects SQL statements sent to database (`BEGIN` and `COMMIT` are not included)
+  """
+  statements: list[str] = []
+
+  def capture(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+  event.listen(conn_manager.engine.sync_engine, "before_cursor_execute", capture)
+
+  try:
+    yield statements
+  finally:
+    event.remove(conn_manager.engine.sync_engine, "before_cursor_execute", capture)
+
+
 @pytest.mark.asyncio
 async def test_db_connection(conn_manager: _ConnectionManager):
   async with conn_manager.get_session_ctx() as session:
@@ -77,13 +161,13 @@ async def test_create_user_parametrized(
     async with conn_manager.get_session_ctx() as session:
         new_user = RegisterUser(email=user["email"], password=user["password"])
 
-        result = await UsersRepository.create_user(session, new_user)
+        result = await UsersRepository.signup_user(session, new_user, "http://test")
 
         if want is None:
             assert result is None
         else:
             assert result is not None
-            assert result.ok == want["ok"]
+            assert result[0].ok == want["ok"]
 
 
 @pytest.mark.asyncio
@@ -103,3 +187,617 @@ async def test_get_user(
       assert result.email == email
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fields", [
+      ("email",),
+      ("user_id", "first_name", "is_verified"),
+])
+async def test_get_public_user(
+    conn_manager: _ConnectionManager,
+    fields
+):
+    async with conn_manager.get_session_ctx() as session:
+      result = await UsersRepository.get_public_user(session, fields, user_id=1)
+
+      assert result is not None
+      assert result.model_dump(exclude_unset=True).keys() == set(fields)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("email,want_user_id", [
+      ("unique1@mail.com", 1),
+      ("missing@mail.com", None)
+])
+async def test_get_credentials(
+    conn_manager: _ConnectionManager,
+    email, want_user_id
+):
+    async with conn_manager.get_session_ctx() as session:
+      result = await UsersRepository.get_credentials(session, email=email)
+
+      if want_user_id is None:
+        assert result is None
+        return
+
+      assert result is not None
+      assert result.user_id == want_user_id
+      assert result.roles == [AvailableRoles.USER]
+      assert result.password.startswith("$argon2")
+
+
+@pytest.mark.asyncio
+async def test_signup_user(conn_manager: _ConnectionManager):
+    async with conn_manager.get_session_ctx() as session:
+      result = await UsersRepository.signup_user(
+        session, RegisterUser(email="signup@mail.com", password="qwerty"), "http://test"
+      )
+
+      assert result is not None
+
+      new_user, v_token = result
+      verification = await VerificationRepository.get(session, v_token.token)
+
+      assert verification is not None
+      assert verification.user_id == new_user.user_id
+
+      credentials = await UsersRepository.get_credentials(session, email="signup@mail.com")
+
+      assert credentials is not None and credentials.roles == [AvailableRoles.USER]
+
+      result = await UsersRepository.signup_user(
+        session, RegisterUser(email="signup@mail.com", password="qwerty"), "http://test"
+      )
+
+      assert result is None
+
+
+async def drain_outbox(conn_manager: _ConnectionManager) -> None:
+  """
+  Delivers messages left by other tests, so outbox test counts only its own
+  """
+  async with conn_manager.get_session_ctx() as session:
+    while (await OutboxRepository.deliver_batch(session, InMemoryTransport(), 100, max_attempts=100)).claimed:
+      pass
+
+
+class FailingTransport:
+
+  def __init__(self, conn_manager: _ConnectionManager) -> None:
+    self.conn_manager = conn_manager
+    self.concurrent_claims: list[int] = []
+
+
+  async def send(self, message: OutboxMessage) -> None:
+    # Another worker runs while this one is sending: leased message is not claimed again
+    async with self.conn_manager.get_session_ctx() as session:
+      batch = await OutboxRepository.deliver_batch(session, InMemoryTransport(), 10, max_attempts=2)
+      self.concurrent_claims.append(batch.claimed)
+
+    raise ConnectionError("smtp is down")
+
+
+@pytest.mark.asyncio
+async def test_deliver_outbox_batch(conn_manager: _ConnectionManager):
+    await drain_outbox(conn_manager)
+
+    transport = InMemoryTransport()
+
+    async with conn_manager.get_session_ctx() as session:
+      await UsersRepository.signup_user(session, RegisterUser(email="outbox@mail.com", password="qwerty"), "http://test")
+
+      batch = await OutboxRepository.deliver_batch(session, transport, batch_size=10, max_attempts=5)
+
+      assert batch.claimed == batch.sent == 1
+      assert transport.sent[0].recipient == "outbox@mail.com"
+      assert transport.sent[0].body.startswith("http://test/verify?token=")
+
+      batch = await OutboxRepository.deliver_batch(session, transport, batch_size=10, max_attempts=5)
+
+      assert batch.claimed == 0
+
+
+@pytest.mark.asyncio
+async def test_deliver_outbox_leases_and_dead_messages(conn_manager: _ConnectionManager):
+    await drain_outbox(conn_manager)
+
+    transport = FailingTransport(conn_manager)
+
+    async with conn_manager.get_session_ctx() as session:
+      await session.execute(insert(OutboxORM).values(recipient="dead@mail.com", subject="subject", body="body"))
+      await session.commit()
+
+      # without backoff failed message is claimed right away
+      for claimed, dead in [(1, 0), (1, 1), (0, 0)]:
+        batch = await OutboxRepository.deliver_batch(
+          session, transport, batch_size=10, max_attempts=2, retry_base_seconds=0
+        )
+        assert (batch.claimed, batch.failed, batch.dead) == (claimed, claimed, dead)
+
+      assert transport.concurrent_claims == [0, 0]
+
+      message = await session.scalar(select(OutboxORM).filter_by(recipient="dead@mail.com"))
+
+      assert message is not None
+      assert message.attempts == 2
+      assert message.dead_at is not None and message.sent_at is None and message.locked_until is None
+
+
+@pytest.mark.asyncio
+async def test_deliver_outbox_backs_off_failed_messages(conn_manager: _ConnectionManager):
+    await drain_outbox(conn_manager)
+
+    transport = FailingTransport(conn_manager)
+
+    async with conn_manager.get_session_ctx() as session:
+      await session.execute(insert(OutboxORM).values(recipient="backoff@mail.com", subject="subject", body="body"))
+      await session.commit()
+
+      async def deliver() -> tuple[int, timedelta]:
+        batch = await OutboxRepository.deliver_batch(
+          session, transport, batch_size=10, max_attempts=5, retry_base_seconds=60, retry_max_seconds=200
+        )
+        delay = await session.scalar(
+          select(OutboxORM.locked_until - func.timezone("utc", func.now())).filter_by(recipient="backoff@mail.com")
+        )
+        return batch.claimed, delay
+
+      # same run keeps polling, failed message waits for its backoff
+      claimed, delay = await deliver()
+      assert claimed == 1 and timedelta(seconds=55) < delay <= timedelta(seconds=60)
+
+      for _ in range(3):
+        assert (await deliver())[0] == 0
+
+      async def expire_backoff():
+        await session.execute(
+          update(OutboxORM)
+          .filter_by(recipient="backoff@mail.com")
+          .values(locked_until=func.timezone("utc", func.now()) - timedelta(seconds=1))
+        )
+        await session.commit()
+
+      await expire_backoff()
+      claimed, delay = await deliver()
+      assert claimed == 1 and timedelta(seconds=115) < delay <= timedelta(seconds=120)
+
+      # capped by retry_max_seconds
+      await expire_backoff()
+      claimed, delay = await deliver()
+      assert claimed == 1 and timedelta(seconds=195) < delay <= timedelta(seconds=200)
+
+      message = await session.scalar(select(OutboxORM).filter_by(recipient="backoff@mail.com"))
+      assert message is not None and message.attempts == 3 and message.dead_at is None
+
+
+@pytest.mark.asyncio
+async def test_deliver_outbox_expired_lease_of_last_attempt(conn_manager: _ConnectionManager):
+    await drain_outbox(conn_manager)
+
+    async with conn_manager.get_session_ctx() as session:
+      # worker crashed while sending the last attempt
+      await session.execute(
+        insert(OutboxORM).values(
+          recipient="crashed@mail.com", subject="subject", body="body", attempts=2, 
+          locked_until=func.timezone("utc", func.now()) - timedelta(seconds=1)
+        )
+      )
+      await session.commit()
+
+      batch = await OutboxRepository.deliver_batch(session, InMemoryTransport(), batch_size=10, max_attempts=2)
+
+      assert (batch.claimed, batch.dead) == (0, 1)
+
+
+@pytest.mark.asyncio
+async def test_bootstrap_upgrades_pre_migrations_database(conn_manager: _ConnectionManager):
+    database = f"{DBConfig.POSTGRES_DB}_pre_migrations"
+
+    async def execute_autocommit(sql: str):
+      async with conn_manager.engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(sql))
+
+    await execute_autocommit(f'DROP DATABASE IF EXISTS "{database}"')
+    await execute_autocommit(f'CREATE DATABASE "{database}"')
+
+    manager = _ConnectionManager(url=DBConfig.DNS.rsplit("/", 1)[0] + f"/{database}")
+
+    try:
+      async with manager.get_conn_ctx() as conn:
+        for sql in PRE_MIGRATIONS_SCHEMA:
+          await conn.execute(text(sql))
+
+        await conn.execute(text("INSERT INTO users (email, password) VALUES ('old@mail.com', 'password_hash')"))
+
+      await bootstrap(manager, migrate=True)
+
+      async with manager.get_conn_ctx() as conn:
+        # raises if schema is not at head
+        await conn.run_sync(sync_schema, False)
+
+        tables = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+        emails = (await conn.scalars(text("SELECT email FROM users"))).all()
+
+      assert {"email_outbox", "maintenance_leases"} <= set(tables)
+      assert "old@mail.com" in emails and len(emails) == 2
+    finally:
+      await manager.dispose()
+      await execute_autocommit(f'DROP DATABASE IF EXISTS "{database}"')
+
+
+@pytest.mark.asyncio
+async def test_sync_schema_refuses_unversioned_database_of_later_schema(conn_manager: _ConnectionManager):
+    async with conn_manager.engine.connect() as conn:
+      # Tables of conn_manager are created by `Base.metadata.create_all` of current models
+      with pytest.raises(RuntimeError):
+        await conn.run_sync(sync_schema, True)
+
+      await conn.rollback()
+
+
+@pytest.mark.asyncio
+async def test_seed_defaults_is_idempotent(conn_manager: _ConnectionManager):
+    for _ in range(2):
+      async with conn_manager.get_conn_ctx() as conn:
+        await seed_defaults(conn)
+
+    async with conn_manager.get_session_ctx() as session:
+      roles = await RolesRepository.get_roles(session)
+      credentials = await UsersRepository.get_credentials(session, email=DBConfig.ADMIN_EMAIL)
+
+      assert roles is not None and len(roles) == len(AvailableRoles)
+      assert credentials is not None
+      assert credentials.roles == [AvailableRoles.ADMIN]
+
+
+
+
+@pytest.mark.asyncio
+async def test_roles_catalog(conn_manager: _ConnectionManager):
+    catalog = _RolesCatalog(ttl=60)
+
+    with count_statements(conn_manager) as statements:
+      async with conn_manager.get_session_ctx() as session:
+        roles = await catalog.load(session)
+        assert len(statements) == 1
+
+        for _ in range(3):
+          assert await catalog.get_roles(session) == roles
+          assert await catalog.get_role_id(session, AvailableRoles.USER) is not None
+
+        assert len(statements) == 1
+
+        catalog.invalidate()
+        await catalog.get_role_id(session, AvailableRoles.ADMIN)
+
+        assert len(statements) == 2
+
+        # missing role is reloaded once, then remembered until ttl passes
+        for _ in range(3):
+          assert await catalog.get_role_id(session, "superadmin") is None # type: ignore
+
+        assert len(statements) == 3
+
+    assert {role.role for role in roles} == set(AvailableRoles)
+
+
+@pytest.mark.asyncio
+async def test_roles_catalog_concurrent_reload(conn_manager: _ConnectionManager):
+    catalog = _RolesCatalog(ttl=60)
+
+    async def get_role_id():
+      async with conn_manager.get_session_ctx() as session:
+        return await catalog.get_role_id(session, AvailableRoles.USER)
+
+    with count_statements(conn_manager) as statements:
+      role_ids = await asyncio.gather(*[get_role_id() for _ in range(5)])
+
+      assert len(statements) == 1
+
+    assert len(set(role_ids)) == 1 and role_ids[0] is not None
+
+
+@pytest.mark.asyncio
+async def test_bulk_grant_and_revoke_roles(conn_manager: _ConnectionManager):
+    async with conn_manager.get_session_ctx() as session:
+      roles = await RolesRepository.get_roles(session)
+      user = await UsersRepository.get_user(session, email="unique1@mail.com")
+
+      assert roles is not None and user is not None
+
+      role_ids = [role.role_id for role in roles]
+      pairs = [RegisterUserRole(user_id=user.user_id, role_id=role_id) for role_id in role_ids]
+      pairs.append(RegisterUserRole(user_id=999_999, role_id=role_ids[0]))
+
+      result = await UsersRolesRepository.grant_many(session, pairs)
+
+      # signup gave user the default role
+      want = [BulkOutcome.ALREADY_GRANTED if role.role == AvailableRoles.USER else BulkOutcome.GRANTED for role in roles]
+      assert [el.outcome for el in result.results] == want + [BulkOutcome.INVALID]
+
+      result = await UsersRolesRepository.grant_many(session, pairs[:1])
+
+      assert result.results[0].outcome == BulkOutcome.ALREADY_GRANTED
+      assert result.counts == {BulkOutcome.ALREADY_GRANTED: 1}
+
+      result = await UsersRolesRepository.revoke_many(session, pairs)
+
+      assert [el.outcome for el in result.results] == [BulkOutcome.REVOKED] * len(role_ids) + [BulkOutcome.NOT_GRANTED]
+      assert await UsersRolesRepository.get_roles_by(session, user.user_id) is None
+
+
+@pytest.mark.asyncio
+async def test_signup_and_update_user_are_single_statements(conn_manager: _ConnectionManager, monkeypatch):
+    hashed: list[str] = []
+
+    async def hash_password(password: str) -> str:
+      hashed.append(password)
+      return await hash_password_async(password)
+
+    monkeypatch.setattr(users_repository, "hash_password_async", hash_password)
+
+    async with conn_manager.get_session_ctx() as session:
+      # default role id is served from catalog after it is loaded
+      await RolesCatalog.get_role_id(session, AvailableRoles.USER)
+
+      with count_statements(conn_manager) as statements:
+        signup = await UsersRepository.signup_user(session, RegisterUser(email="single@mail.com", password="qwerty"), "http://test")
+
+      # email lookup and single insert of user, role, verification and outbox message
+      assert signup is not None
+      assert len(statements) == 2 and len(hashed) == 1
+
+      with count_statements(conn_manager) as statements:
+        duplicate = await UsersRepository.signup_user(session, RegisterUser(email="single@mail.com", password="qwerty"), "http://test")
+
+      # taken email is rejected by the lookup, without hashing
+      assert duplicate is None
+      assert len(statements) == 1 and len(hashed) == 1
+
+      created, _ = signup
+
+      with count_statements(conn_manager) as statements:
+        updated = await UsersRepository.update_user(
+          session, created.user_id, UpdateUser(email="single@mail.com", password="new_password")
+        )
+
+        with pytest.raises(HTTPException) as exc:
+          await UsersRepository.update_user(session, created.user_id, UpdateUser(email="unique1@mail.com"))
+        assert exc.value.status_code == status.HTTP_400_BAD_REQUEST
+
+        with pytest.raises(HTTPException) as exc:
+          await UsersRepository.update_user(session, 999_999, UpdateUser(first_name="name"))
+        assert exc.value.status_code == status.HTTP_404_NOT_FOUND
+
+      assert updated.user_id == created.user_id
+      assert len(statements) == 3
+
+      credentials = await UsersRepository.get_credentials(session, user_id=created.user_id)
+
+      assert credentials is not None
+      assert verify_password("new_password", credentials.password)
+
+
+@pytest.mark.asyncio
+async def test_signup_user_handles_email_taken_after_lookup(conn_manager: _ConnectionManager, monkeypatch):
+    async def hash_password(password: str) -> str:
+      # concurrent signup with the same email commits while this one hashes
+      async with conn_manager.get_conn_ctx() as conn:
+        await conn.execute(insert(UsersORM).values(email="race@mail.com", password="password_hash"))
+
+      return "password_hash"
+
+    async with conn_manager.get_session_ctx() as session:
+      await RolesCatalog.get_role_id(session, AvailableRoles.USER)
+
+      monkeypatch.setattr(users_repository, "hash_password_async", hash_password)
+
+      assert await UsersRepository.signup_user(session, RegisterUser(email="race@mail.com", password="qwerty"), "http://test") is None
+
+
+@pytest.mark.asyncio
+async def test_verify_user_by_token(conn_manager: _ConnectionManager):
+    async with conn_manager.get_session_ctx() as session:
+      result = await UsersRepository.signup_user(
+        session, RegisterUser(email="verify@mail.com", password="qwerty"), "http://test"
+      )
+      assert result is not None
+
+      new_user, v_token = result
+
+      result = await UsersRepository.signup_user(
+        session, RegisterUser(email="expired@mail.com", password="qwerty"), "http://test"
+      )
+      assert result is not None
+
+      _, expired = result
+
+      await session.execute(
+        text("UPDATE verifications SET expires_at = now() - interval '1 day' WHERE token = :token"),
+        {"token": expired.token}
+      )
+      await session.commit()
+
+      with count_statements(conn_manager) as statements:
+        verified = await UsersRepository.verify_user_by_token(session, v_token.token)
+
+      assert verified.user_id == new_user.user_id
+      assert len(statements) == 1
+      assert await VerificationRepository.get(session, v_token.token) is None
+
+      for token in [v_token.token, expired.token, "missing"]:
+        with pytest.raises(HTTPException) as exc:
+          await UsersRepository.verify_user_by_token(session, token)
+        assert exc.value.status_code == status.HTTP_403_FORBIDDEN
+
+      user = await UsersRepository.get_user(session, user_id=new_user.user_id)
+      assert user is not None and user.is_verified
+
+
+@pytest.mark.asyncio
+async def test_purge_expired_users_batch(conn_manager: _ConnectionManager):
+    async with conn_manager.get_session_ctx() as session:
+      await session.execute(text("""
+        WITH new_users AS (
+          INSERT INTO users (email, password, is_verified)
+          SELECT 'purge' || i || '@mail.com', 'password_hash', i = 0 FROM generate_series(0, 4) AS i
+          RETURNING user_id
+        )
+        INSERT INTO verifications (user_id, token, expires_at)
+        SELECT user_id, 'purge' || user_id, now() - interval '1 day' FROM new_users
+      """))
+      await session.commit()
+
+      deleted = 0
+
+      while True:
+        batch = await PurgeRepository.purge_expired_users_batch(session, batch_size=2)
+        deleted += batch.deleted
+
+        assert batch.claimed <= 2
+        assert batch.deleted <= batch.claimed
+
+        if batch.claimed < 2:
+          break
+
+      assert deleted >= 4
+
+      verified = await UsersRepository.get_user(session, email="purge0@mail.com")
+      assert verified is not None
+      assert await UsersRepository.get_user(session, email="purge1@mail.com") is None
+
+      expired = await session.scalar(text("SELECT count(*) FROM verifications WHERE expires_at < now()"))
+      assert expired == 0
+
+
+@pytest.mark.asyncio
+async def test_purge_expired_users_batch_rejects_stale_fencing_token(conn_manager: _ConnectionManager):
+    async def add_expired_user(email: str):
+      await session.execute(text("""
+        WITH new_user AS (
+          INSERT INTO users (email, password, is_verified) VALUES (:email, 'password_hash', false)
+          RETURNING user_id
+        )
+        INSERT INTO verifications (user_id, token, expires_at)
+        SELECT user_id, 'fence' || user_id, now() - interval '1 day' FROM new_user
+      """), {"email": email})
+      await session.commit()
+
+    async with conn_manager.get_session_ctx() as session:
+      await add_expired_user("fence1@mail.com")
+
+      batch = await PurgeRepository.purge_expired_users_batch(session, 10, Lease("purge-fence-test", "new", 2))
+      assert batch.deleted >= 1
+      assert await session.scalar(
+        select(MaintenanceLeasesORM.token).filter(MaintenanceLeasesORM.name == "purge-fence-test")
+      ) == 2
+
+      # holder of older lease woke up after the lock was taken over
+      await add_expired_user("fence2@mail.com")
+
+      with pytest.raises(LockLostError):
+        await PurgeRepository.purge_expired_users_batch(session, 10, Lease("purge-fence-test", "old", 1))
+
+      assert await UsersRepository.get_user(session, email="fence2@mail.com") is not None
+
+      batch = await PurgeRepository.purge_expired_users_batch(session, 10, Lease("purge-fence-test", "new", 2))
+      assert batch.deleted >= 1
+      assert await UsersRepository.get_user(session, email="fence2@mail.com") is None
+
+
+def test_redis_lock_backend():
+    client = redis.Redis.from_url(Config.URL)
+    backend = RedisLockBackend(client, prefix=f"test-lock-{uuid.uuid4().hex}:")
+    name = "purge_expired_users"
+
+    try:
+      token = backend.acquire(name, "first", 10_000)
+      assert token == 1
+      assert backend.acquire(name, "second", 10_000) is None
+
+      assert not backend.extend(name, "second", 10_000)
+      assert backend.extend(name, "first", 20_000)
+      assert client.pttl(backend.prefix + name) > 10_000
+
+      assert not backend.release(name, "second")
+      assert backend.release(name, "first")
+      assert not backend.release(name, "first")
+
+      assert backend.acquire(name, "second", 50) == token + 1
+      time.sleep(0.1)
+
+      # expired holder can neither prolong nor release lock of the next one
+      assert backend.acquire(name, "third", 10_000) == token + 2
+      assert not backend.extend(name, "second", 10_000)
+      assert not backend.release(name, "second")
+      assert client.get(backend.prefix + name) == b"third"
+
+      backend.incr_stat(name, "acquired")
+      backend.incr_stat(name, "wait_seconds", 0.5)
+      backend.incr_stat(name, "acquired")
+      assert backend.stats(name) == {"acquired": 2, "wait_seconds": 0.5}
+    finally:
+      keys = list(client.scan_iter(backend.prefix + "*"))
+      if keys:
+        client.delete(*keys)
+      client.close()
+
+
+def test_worker_runtime_reuses_pooled_connections():
+    manager = _ConnectionManager(url=DBConfig.DNS, pool_size=1)
+    runtime = _WorkerRuntime(manager)
+    connects = []
+
+    event.listen(manager.engine.sync_engine, "connect", lambda *args: connects.append(args))
+
+    async def task():
+      async with manager.get_session_ctx() as session:
+        return await session.scalar(text("SELECT 1"))
+
+    try:
+      for _ in range(3):
+        assert runtime.run(task()) == 1
+    finally:
+      runtime.stop()
+
+    assert len(connects) == 1
+    assert manager.engine.pool.checkedin() == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics_measure_checkout_wait():
+  manager = _ConnectionManager(url=DBConfig.DNS, pool_size=1, max_overflow=0)
+  metrics = manager.pool_metrics
+  gauges = {gauge.name: gauge for gauge in metrics.gauges}
+
+  async def hold(seconds: float):
+    async with manager.engine.connect() as conn:
+      await conn.execute(text("SELECT 1"))
+      await asyncio.sleep(seconds)
+
+  try:
+    holder = asyncio.create_task(hold(0.2))
+    await asyncio.sleep(0.05)
+
+    assert gauges["db_pool_checked_out"].getter() == 1
+
+    # waits until holder returns the only connection
+    await hold(0)
+    await holder
+
+    assert metrics.checkout_wait.count() == 2
+    assert metrics.checkout_wait.series[()][-1] >= 0.1
+    assert metrics.connections_created.value == 1
+    assert gauges["db_pool_checked_out"].getter() == 0
+    assert gauges["db_pool_idle"].getter() == 1
+
+    # recreated pool keeps reporting to the same metrics
+    await manager.dispose()
+    await hold(0)
+
+    assert metrics.checkout_wait.count() == 3
+    assert metrics.connections_created.value == 2
+  finally:
+    await manager.dispose()
+
+  assert "db_pool_overflow 0.0" in "\n".join(metrics.collect())
@@ -0,0 +1,12 @@
+
+from utils.models import ConfigModel
+
+
+class _UsersConfig(ConfigModel):
+
+  #Authenticated users cache
+  USER_CACHE_SIZE: int = 10_000
+  USER_CACHE_TTL_SECONDS: float = 30
+
+
+UsersConfig = _UsersConfig() # type: ignore
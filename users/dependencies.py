@@ -0,0 +1,32 @@
+from typing import Annotated
+
+from fastapi import Depends, HTTPException, Query, status
+
+from users.models import PUBLIC_USER_FIELDS
+
+
+def get_user_fields(
+  fields: Annotated[
+    str | None, 
+    Query(description=f"Comma separated projection, any of: {', '.join(PUBLIC_USER_FIELDS)}")
+  ] = None
+) -> tuple[str, ...]:
+  """
+  :returns: requested fields in `PublicUser` order, all public fields by default
+  """
+  if not fields:
+    return PUBLIC_USER_FIELDS
+
+  requested = {field.strip() for field in fields.split(",") if field.strip()}
+  unknown = requested.difference(PUBLIC_USER_FIELDS)
+
+  if unknown or not requested:
+    raise HTTPException(
+      detail=f"unknown fields: {', '.join(sorted(unknown))}", 
+      status_code=status.HTTP_400_BAD_REQUEST
+    )
+
+  return tuple(field for field in PUBLIC_USER_FIELDS if field in requested)
+
+
+UserFieldsDepends = Annotated[tuple[str, ...], Depends(get_user_fields)]
@@ -30,11 +30,33 @@ class User(RegisterUser):
   is_verified: bool
 
 
+class PublicUser(BaseModel):
+  """
+  What user read endpoints return. Has no password hash.
+  Fields not requested by `fields=` projection are left unset and omitted from responce
+  """
+  user_id: int | None = None
+  email: str | None = None
+  first_name: str | None = None
+  last_name: str | None = None
+  created_at: datetime | None = None
+  is_verified: bool | None = None
+
+
+PUBLIC_USER_FIELDS = tuple(PublicUser.model_fields)
+
+
 class UserWithRoles(BaseModel):
   user: User
   roles: list[str]
 
 
+class UserCredentials(BaseModel):
+  user_id: int
+  password: str
+  roles: list[str]
+
+
 class UpdateUser(BaseModel):
   email: Annotated[str | None, EMAIL_FIELD] = None
   password: Annotated[str | None, PASSWORD_FIELD] = None
@@ -1,30 +1,130 @@
 
+from datetime import timedelta
+
 from fastapi import HTTPException, status
-from sqlalchemy import delete, insert, text, select, update
+from psycopg.errors import UniqueViolation
+from sqlalchemy import delete, exists, insert, literal, text, select, update
+from sqlalchemy.dialects.postgresql import array_agg, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from auth.utils import hash_password
-from db.config import DBConfig
-from users.models import OKResponce, RegisterUser, UpdateUser, User, UsersORM
+from auth.config import AuthConfig
+from auth.utils import (
+  generate_verification_link, generate_verification_token, get_expiration_time, get_utc_time, hash_password_async
+)
+from auth.verification.models import VerificationToken, VerificationsORM
+from notifications.models import OutboxORM
+from roles.models import AvailableRoles, RolesORM
+from roles.repository import RolesCatalog
+from users.config import UsersConfig
+from users.models import (
+  PUBLIC_USER_FIELDS, OKResponce, PublicUser, RegisterUser, UpdateUser, User, UserCredentials, 
+  UsersORM
+)
+from users_roles.models import UsersRolesORM
+from utils.cache import TTLCache
+from utils.pagination import Page, PageParams, build_page
+from utils.serialization import validate_rows
+
+
+UsersCache: TTLCache[int, User] = TTLCache(
+  maxsize=UsersConfig.USER_CACHE_SIZE, 
+  ttl=UsersConfig.USER_CACHE_TTL_SECONDS
+)
 
 
 class UsersRepository:
 
   @staticmethod
-  async def create_user(session: AsyncSession, user: RegisterUser) -> OKResponce | None:
-    if await UsersRepository.isUserExist(session, email=user.email):
+  async def signup_user(
+    session: AsyncSession, 
+    user: RegisterUser, 
+    verification_base_url: str
+  ) -> tuple[OKResponce, VerificationToken] | None:
+    """
+    Creates user with default role, verification token and verification email in outbox
+    in one statement and one commit. Default role id comes from `RolesCatalog`:
+
+    `INSERT users ... ON CONFLICT DO NOTHING` CTE feeds `users_roles`, `verifications` and `email_outbox` inserts,
+    so if email is taken nothing is inserted at all
+
+    Taken email is looked up by unique index first, so it does not pay for password hashing.
+    Email taken between the lookup and the insert is still handled by `ON CONFLICT`
+
+    :returns: created user_id and verification token or `None` if user exists
+    """    
+    if await session.scalar(select(exists().where(UsersORM.email == user.email))):
       return None
 
-    hashed_password = hash_password(user.password)
+    hashed_password = await hash_password_async(user.password)
     user.set_hashed_password(hashed_password)
 
-    stmt = insert(UsersORM).values(**user.model_dump()).returning(UsersORM.user_id)
+    role_id = await RolesCatalog.get_role_id(session, AvailableRoles.USER)
+
+    if role_id is None:
+      raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Default user role is missing")
 
-    result = await session.execute(stmt)
+    token = generate_verification_token()
+    expires_at = get_expiration_time(timedelta(days=AuthConfig.VERIFICATION_TOKEN_EXPIRE_DAYS))
+
+    new_user = (
+      pg_insert(UsersORM)
+      .values(**user.model_dump())
+      .on_conflict_do_nothing(index_elements=[UsersORM.email])
+      .returning(UsersORM.user_id)
+      .cte("new_user")
+    )
+
+    new_user_role = (
+      insert(UsersRolesORM)
+      .from_select(
+        ["user_id", "role_id"],
+        select(new_user.c.user_id, literal(role_id, UsersRolesORM.role_id.type))
+      )
+      .returning(UsersRolesORM.id)
+      .cte("new_user_role")
+    )
+
+    new_verification = (
+      insert(VerificationsORM)
+      .from_select(
+        ["user_id", "token", "expires_at"],
+        select(
+          new_user.c.user_id, 
+          literal(token, VerificationsORM.token.type), 
+          literal(expires_at, VerificationsORM.expires_at.type)
+        )
+      )
+      .returning(VerificationsORM.id)
+      .cte("new_verification")
+    )
+
+    verification_link = generate_verification_link(verification_base_url, token)
+
+    new_message = (
+      insert(OutboxORM)
+      .from_select(
+        ["recipient", "subject", "body"],
+        select(
+          literal(user.email, OutboxORM.recipient.type),
+          literal("Verify your email", OutboxORM.subject.type),
+          literal(verification_link, OutboxORM.body.type)
+        ).select_from(new_user)
+      )
+      .returning(OutboxORM.id)
+      .cte("new_message")
+    )
+
+    stmt = select(new_user.c.user_id).add_cte(new_user_role, new_verification, new_message)
+
+    result = await session.scalar(stmt)
 
     await session.commit()
 
-    return OKResponce(ok=True, user_id=result.scalar_one())
+    if result is None:
+      return None
+
+    return OKResponce(ok=True, user_id=result), VerificationToken(token=token)
 
 
   @staticmethod
@@ -40,15 +140,92 @@ class UsersRepository:
 
 
   @staticmethod
-  async def get_users(session: AsyncSession) -> list[User] | None:
-    query = select(UsersORM)
+  async def get_credentials(session: AsyncSession, **kwargs) -> UserCredentials | None:
+    """
+    Gets password hash, user_id and role names of user in one round trip
+    (users left joined with users_roles and roles, roles aggregated to array)
+    """    
+    roles = array_agg(RolesORM.role).filter(RolesORM.role.is_not(None))
+
+    query = (
+      select(UsersORM.user_id, UsersORM.password, roles.label("roles"))
+      .outerjoin(UsersRolesORM, UsersRolesORM.user_id == UsersORM.user_id)
+      .outerjoin(RolesORM, RolesORM.role_id == UsersRolesORM.role_id)
+      .filter(*[getattr(UsersORM, key) == value for key, value in kwargs.items()])
+      .group_by(UsersORM.user_id)
+    )
 
-    data = await session.scalars(query)
+    data = (await session.execute(query)).first()
 
     if data is None:
       return None
 
-    return [User.model_validate(el, from_attributes=True) for el in data]
+    return UserCredentials(user_id=data.user_id, password=data.password, roles=data.roles or [])
+
+
+  @staticmethod
+  async def get_cached_user(session: AsyncSession, user_id: int) -> User | None:
+    """
+    Same as `get_user` by *user_id*, but served from `UsersCache` when possible.
+    Methods that change users invalidate their cache entries
+    """    
+    user = UsersCache.get(user_id)
+
+    if user is not None:
+      return user
+
+    user = await UsersRepository.get_user(session, user_id=user_id)
+
+    if user is not None:
+      UsersCache.set(user_id, user)
+
+    return user
+
+
+  @staticmethod
+  async def get_public_user(
+    session: AsyncSession, 
+    fields: tuple[str, ...] = PUBLIC_USER_FIELDS, 
+    **kwargs
+  ) -> PublicUser | None:
+    """
+    Selects only *fields* columns (password is never selected)
+    """    
+    query = select(*[getattr(UsersORM, field) for field in fields]).filter_by(**kwargs)
+
+    row = (await session.execute(query)).first()
+
+    if row is None:
+      return None
+
+    return PublicUser.model_validate(row._asdict())
+
+
+  @staticmethod
+  async def get_users(
+    session: AsyncSession, 
+    page: PageParams, 
+    fields: tuple[str, ...] = PUBLIC_USER_FIELDS
+  ) -> Page[PublicUser]:
+    """
+    Keyset pagination by `user_id`, so every page costs the same regardless of its depth.
+    Selects only *fields* columns, `user_id` is always selected for cursor
+    """    
+    columns = [getattr(UsersORM, field) for field in fields]
+
+    # Labeled separately, so it is not picked up as `user_id` field when it was not requested
+    cursor = UsersORM.user_id.label("cursor")
+
+    query = select(cursor, *columns).order_by(UsersORM.user_id).limit(page.limit + 1)
+
+    if page.after is not None:
+      query = query.filter(UsersORM.user_id > page.after)
+
+    rows = (await session.execute(query)).all()
+
+    result = build_page(rows, page.limit, key=lambda row: row.cursor)
+
+    return Page(items=validate_rows(PublicUser, result.items), next_cursor=result.next_cursor)
 
 
   @staticmethod
@@ -59,6 +236,8 @@ class UsersRepository:
 
     await session.commit()
 
+    UsersCache.invalidate(user_id)
+
     if result is None:
       return None
 
@@ -73,41 +252,51 @@ class UsersRepository:
 
     await session.commit()
 
+    UsersCache.invalidate(*users_id)
+
     result = resp.all()
 
     if not result:
       return None
 
-    return [OKResponce(ok=True, user_id=user_id) for user_id in users_id] 
+    return [OKResponce(ok=True, user_id=user_id) for user_id in result] 
 
 
   @staticmethod
   async def update_user(session: AsyncSession, user_id: int, user: UpdateUser) -> OKResponce:
     """
-    I could not do optional returning type of this function, because of 
-    lots of various error cases. If you have any tips please let me know)
+    One `UPDATE ... RETURNING`, new password is hashed before.
+
+    :raises HTTPException: 404 when user does not exist, 400 when new email is taken by other user
     """    
-    user_in_db = await UsersRepository.get_user(session, user_id=user_id)
-    
-    if user_in_db is None:
-      raise HTTPException(detail=f"user {user_id} not exists", status_code=status.HTTP_404_NOT_FOUND)
+    values = user.model_dump(exclude_none=True, exclude_defaults=True)
 
-    if user.email:
-      if user_in_db.email == user.email or await UsersRepository.isUserExist(session, email=user.email):
-        raise HTTPException(detail=f"user {user.email} already exists", status_code=status.HTTP_400_BAD_REQUEST)
+    if "password" in values:
+      values["password"] = await hash_password_async(values["password"])
 
     stmt = (
       update(UsersORM)
-        .values(**user.model_dump(exclude_none=True, exclude_defaults=True))
+        .values(**values)
         .filter_by(user_id=user_id)
         .returning(UsersORM.user_id)
     )
 
-    result = await session.scalar(stmt)
+    try:
+      result = await session.scalar(stmt)
+    except IntegrityError as e:
+      await session.rollback()
+
+      if isinstance(e.orig, UniqueViolation):
+        raise HTTPException(detail=f"user {user.email} already exists", status_code=status.HTTP_400_BAD_REQUEST)
+
+      raise
 
     await session.commit()
 
-    assert result is not None
+    UsersCache.invalidate(user_id)
+
+    if result is None:
+      raise HTTPException(detail=f"user {user_id} not exists", status_code=status.HTTP_404_NOT_FOUND)
 
     return OKResponce(ok=True, user_id=result)
 
@@ -125,6 +314,8 @@ class UsersRepository:
 
     await session.commit()
 
+    UsersCache.invalidate(user_id)
+
     if result is None:
       return None
 
@@ -132,31 +323,63 @@ class UsersRepository:
 
 
   @staticmethod
-  async def isUserExist(session: AsyncSession, **kwrgs) -> bool:
-    query = select(UsersORM.user_id).filter_by(**kwrgs)
+  async def verify_user_by_token(session: AsyncSession, token: str) -> OKResponce:
+    """
+    One statement: deletes (consumes) valid not expired verification row 
+    and marks its user as verified. Consumed rows never stay in `verifications`
 
-    result = await session.scalars(query)
+    :raises HTTPException: 403 when token is invalid or expired, 400 when user is already verified
+    """    
+    consumed = (
+      delete(VerificationsORM)
+      .filter(VerificationsORM.token == token, VerificationsORM.expires_at >= get_utc_time())
+      .returning(VerificationsORM.user_id)
+      .cte("consumed")
+    )
 
-    if result.first() is None:
-      return False
+    verified = (
+      update(UsersORM)
+      .values(is_verified=True)
+      .filter(UsersORM.user_id == consumed.c.user_id, UsersORM.is_verified.is_(False))
+      .returning(UsersORM.user_id)
+      .cte("verified")
+    )
 
-    return True
+    query = (
+      select(consumed.c.user_id, verified.c.user_id.label("verified_user_id"))
+      .outerjoin(verified, verified.c.user_id == consumed.c.user_id)
+    )
 
+    row = (await session.execute(query)).first()
 
-  @staticmethod
-  async def add_main_admin(session: AsyncSession) -> OKResponce | None:
-    admin = RegisterUser(email=DBConfig.ADMIN_EMAIL, password=DBConfig.ADMIN_PASSWORD)
+    await session.commit()
+
+    if row is None:
+      raise HTTPException(detail=f"token invalid or expired", status_code=status.HTTP_403_FORBIDDEN)
+
+    UsersCache.invalidate(row.user_id)
 
-    result = await UsersRepository.create_user(session, admin)
+    if row.verified_user_id is None:
+      raise HTTPException(detail=f"user already verified", status_code=status.HTTP_400_BAD_REQUEST)
 
-    assert result is not None
+    return OKResponce(ok=True, user_id=row.verified_user_id)
 
-    await UsersRepository.verify_user(session, result.user_id)
 
-    return result
+  @staticmethod
+  async def isUserExist(session: AsyncSession, **kwrgs) -> bool:
+    query = select(UsersORM.user_id).filter_by(**kwrgs)
+
+    result = await session.scalars(query)
+
+    if result.first() is None:
+      return False
+
+    return True
 
 
   @staticmethod
   async def truncate_table(session: AsyncSession):
     await session.execute(text("TRUNCATE TABLE users RESTART IDENTITY CASCADE"))
-    await session.commit()
\ No newline at end of file
+    await session.commit()
+
+    UsersCache.clear()
\ No newline at end of file
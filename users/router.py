@@ -1,11 +1,14 @@
 from typing import Annotated
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, Response, status
 
 from auth.dependencies import AdminDependency, ValidUserDependency, is_admin
 from db.connection import AsyncSessionDepends
-from users.models import OKResponce, UpdateUser, User, UserWithRoles
+from users.dependencies import UserFieldsDepends
+from users.models import OKResponce, PublicUser, UpdateUser, UserWithRoles
 from users.repository import UsersRepository
-from utils.common_responses import authorization_header, token_responses
+from utils.common_responses import authorization_header, not_modified_responce, token_responses
+from utils.etag import check_etag
+from utils.pagination import Page, PageParamsDepends
 
 users_router = APIRouter(prefix="/users", tags=["users"])
 
@@ -22,20 +25,19 @@ not_found_responce = {
 }
 
 
-@users_router.get('/me', 
+@users_router.get('/me', response_model_exclude_unset=True,
   summary="Get token holder info",
   openapi_extra={
     **authorization_header
   },
   responses={
     "200":{
-      "model": User,
+      "model": PublicUser,
       "description": "Returns token holder user info",
       "content": {
         "application/json": {
           "example": {
             "email": "some1@mail.ru",
-            "password": "$argon2id$v=19$m=65536,t=3,p=4$RILMC5LB/l/RkFPztO5YIQ$ePFKMnyP3YmMb0EfO4MvXgmj0ew4sm+3UcJEueUVRAc",
             "first_name": "some name",
             "last_name": None,
             "user_id": 11,
@@ -45,27 +47,41 @@ not_found_responce = {
         }
       },
     },
-    **token_responses
+    **token_responses,
+    **not_modified_responce
   },
 )
-async def get_me(user: Annotated[UserWithRoles, ValidUserDependency]) -> User:
-  return user.user
+async def get_me(
+  user: Annotated[UserWithRoles, ValidUserDependency], 
+  fields: UserFieldsDepends, 
+  request: Request, 
+  response: Response
+) -> PublicUser:
+  """
+  Pass `fields=email,first_name` to get only listed fields.
+
+  Responce has weak `ETag`, send it back in `If-None-Match` to get 304 while user info is unchanged
+  """
+  public_user = PublicUser.model_validate(user.user.model_dump(include=set(fields)))
+
+  check_etag(request, response, public_user.model_dump(exclude_unset=True), "private, no-cache")
+
+  return public_user
 
 
-@users_router.get('/{user_id}', dependencies=[AdminDependency],
+@users_router.get('/{user_id}', dependencies=[AdminDependency], response_model_exclude_unset=True,
   summary="Get user by user_id (only for admin)",
   openapi_extra={
     **authorization_header
   },
   responses={
     "200":{
-      "model": User,
+      "model": PublicUser,
       "description": "Returns users info by user_id (only with admin credentials)",
       "content": {
         "application/json": {
           "example": {
               "email": "some2@mail.ru",
-              "password": "$argon2id$v=19$m=65536,t=3,p=4$RILMC5LB/l/RkFPztO5YIQ$ePFKMnyP3YmMb0EfO4MvXgmj0ew4sm+3UcJEueUVRAc",
               "user_id": 11,
               "created_at": "2025-10-26T17:14:43.648004",
               "is_verified": True
@@ -77,8 +93,11 @@ async def get_me(user: Annotated[UserWithRoles, ValidUserDependency]) -> User:
     **not_found_responce
   },
 )
-async def get_user(user_id: int,  session: AsyncSessionDepends) -> User:
-  user = await UsersRepository.get_user(session, user_id=user_id)
+async def get_user(user_id: int, session: AsyncSessionDepends, fields: UserFieldsDepends) -> PublicUser:
+  """
+  Pass `fields=email,first_name` to get only listed fields
+  """
+  user = await UsersRepository.get_public_user(session, fields, user_id=user_id)
 
   if user is None:
     raise HTTPException(detail=f"user {user_id} does not exists", status_code=status.HTTP_404_NOT_FOUND)
@@ -117,49 +136,52 @@ async def delete_user(user_id: int, session: AsyncSessionDepends) -> OKResponce:
   return result
 
 
-@users_router.get('/', dependencies=[AdminDependency],
-  summary="Get all users (only for admin)",
+@users_router.get('/', dependencies=[AdminDependency], response_model_exclude_unset=True,
+  summary="Get page of users (only for admin)",
   openapi_extra={
     **authorization_header
   },
   responses={
     "200":{
-      "model": User,
-      "description": "Returns all users info (only with admin credentials)",
+      "model": Page[PublicUser],
+      "description": "Returns page of users info ordered by user_id (only with admin credentials). "
+                     "Pass `next_cursor` as `cursor` to get next page, it is `null` on the last page",
       "content": {
         "application/json": {
-          "example": [
-            {
-              "email": "some1@mail.ru",
-              "password": "$argon2id$v=19$m=65536,t=3,p=4$RILMC5LB/l/RkFPztO5YIQ$ePFKMnyP3YmMb0EfO4MvXgmj0ew4sm+3UcJEueUVRAc",
-              "first_name": "some name",
-              "last_name": None,
-              "user_id": 11,
-              "created_at": "2025-10-26T17:14:43.648004",
-              "is_verified": False
-            },
-            {
-              "email": "some2@mail.ru",
-              "password": "$argon2id$v=19$m=65536,t=3,p=4$RILMC5LB/l/RkFPztO5YIQ$ePFKMnyP3YmMb0EfO4MvXgmj0ew4sm+3UcJEueUVRAc",
-              "user_id": 11,
-              "created_at": "2025-10-26T17:14:43.648004",
-              "is_verified": True
-            }
-          ]
+          "example": {
+            "items": [
+              {
+                "email": "some1@mail.ru",
+                "first_name": "some name",
+                "last_name": None,
+                "user_id": 11,
+                "created_at": "2025-10-26T17:14:43.648004",
+                "is_verified": False
+              },
+              {
+                "email": "some2@mail.ru",
+                "user_id": 12,
+                "created_at": "2025-10-26T17:14:43.648004",
+                "is_verified": True
+              }
+            ],
+            "next_cursor": "eyJhZnRlciI6IDEyfQ"
+          }
         }
       },
     },
     **token_responses,
-    **not_found_responce
   },
 )
-async def get_all_users(session: AsyncSessionDepends) -> list[User]:
-  result = await UsersRepository.get_users(session)
-
-  if result is None:
-    raise HTTPException(detail=f"users not found", status_code=status.HTTP_404_NOT_FOUND)
-
-  return result
+async def get_all_users(
+  page: PageParamsDepends, 
+  session: AsyncSessionDepends, 
+  fields: UserFieldsDepends
+) -> Page[PublicUser]:
+  """
+  Pass `fields=email,first_name` to get only listed fields of each user
+  """
+  return await UsersRepository.get_users(session, page, fields)
 
 
 @users_router.patch('/{user_id}',
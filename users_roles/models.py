@@ -1,16 +1,24 @@
 
 from datetime import datetime
+from enum import StrEnum
+from typing import Annotated
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy import ForeignKey, UniqueConstraint
 
 from db.models import CREATED_AT, INT_PK, Base
 
 
+# ids are `serial` (int4) columns, bigger values would fail in database instead of validation
+INT4_MAX = 2**31 - 1
+
+ID = Annotated[int, Field(ge=1, le=INT4_MAX)]
+
+
 class RegisterUserRole(BaseModel):
-  user_id: int
-  role_id: int
+  user_id: ID
+  role_id: ID
 
 
 class UserRoles(RegisterUserRole):
@@ -23,17 +31,49 @@ class OKResponce(BaseModel):
   id: int
 
 
+MAX_BULK_PAIRS = 10_000
+
+
+class BulkUserRoles(BaseModel):
+  pairs: Annotated[list[RegisterUserRole], Field(min_length=1, max_length=MAX_BULK_PAIRS)]
+
+
+class BulkOutcome(StrEnum):
+  GRANTED = "granted"
+  ALREADY_GRANTED = "already_granted"
+  REVOKED = "revoked"
+  NOT_GRANTED = "not_granted"
+  # user or role does not exist
+  INVALID = "invalid"
+
+
+class UserRoleOutcome(RegisterUserRole):
+  outcome: BulkOutcome
+
+
+class BulkUserRolesResult(BaseModel):
+  """
+  :param results: outcome of every requested pair in request order
+
+  :param counts: number of pairs with each outcome
+  """
+  results: list[UserRoleOutcome]
+  counts: dict[BulkOutcome, int]
+
+
 class UsersRolesORM(Base):
   """
   In some situations `relationship` from sqlalchemy is better choise,
   however i left with simple and brief `join`-usage structure of tables
+
+  Lookups by `user_id` are served by (user_id, role_id) unique index, so only `role_id` has its own one
   """
   
   __tablename__ = "users_roles"
 
   id: Mapped[INT_PK]
   user_id:  Mapped[int] = mapped_column(ForeignKey("users.user_id", ondelete="CASCADE"))
-  role_id:  Mapped[int] = mapped_column(ForeignKey("roles.role_id", ondelete="CASCADE"))
+  role_id:  Mapped[int] = mapped_column(ForeignKey("roles.role_id", ondelete="CASCADE"), index=True)
   created_at: Mapped[CREATED_AT]
 
   __table_args__ = (UniqueConstraint("user_id", "role_id"), )
\ No newline at end of file
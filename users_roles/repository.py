@@ -1,13 +1,21 @@
 from fastapi import HTTPException, status
 from psycopg.errors import ForeignKeyViolation, UniqueViolation
+from collections import Counter
+from typing import Callable, Sequence
+
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import insert, select
+from sqlalchemy import CTE, Integer, Row, and_, delete, exists, func, insert, literal, select
 from sqlalchemy.orm import aliased
 from sqlalchemy.exc import IntegrityError
 
-from roles.models import AvailableRoles, RolesORM, UserRole
-from roles.repository import RolesRepository
-from users_roles.models import OKResponce, RegisterUserRole, UserRoles, UsersRolesORM
+from roles.models import RolesORM, UserRole
+from users.models import UsersORM
+from users_roles.models import (
+  BulkOutcome, BulkUserRolesResult, OKResponce, RegisterUserRole, UserRoleOutcome, UserRoles, UsersRolesORM
+)
+from utils.pagination import Page, PageParams, build_page
+from utils.serialization import validate_rows
 
 
 class UsersRolesRepository:
@@ -28,16 +36,24 @@ class UsersRolesRepository:
     return [UserRole(role=role) for role in result]
 
   @staticmethod
-  async def get_all(session: AsyncSession) -> list[UserRoles] | None:
-    query = select(UsersRolesORM)
+  async def get_all(session: AsyncSession, page: PageParams) -> Page[UserRoles]:
+    """
+    Keyset pagination by `id`, so every page costs the same regardless of its depth
+    """    
+    query = (
+      select(UsersRolesORM.id, UsersRolesORM.user_id, UsersRolesORM.role_id, UsersRolesORM.created_at)
+      .order_by(UsersRolesORM.id)
+      .limit(page.limit + 1)
+    )
 
-    res = await session.scalars(query)
-    result = res.all()
+    if page.after is not None:
+      query = query.filter(UsersRolesORM.id > page.after)
 
-    if not result:
-      return None
+    res = await session.execute(query)
 
-    return [UserRoles.model_validate(el, from_attributes=True) for el in result]
+    users_roles = validate_rows(UserRoles, res.all())
+
+    return build_page(users_roles, page.limit, key=lambda user_role: user_role.id)
 
 
   @staticmethod
@@ -65,26 +81,111 @@ class UsersRolesRepository:
 
 
   @staticmethod
-  async def add_default_user_role(session: AsyncSession, user_id: int) -> OKResponce | None:
-    default_user_role = AvailableRoles.USER
-
-    resp = await RolesRepository.get_role(session, default_user_role)
-
-    assert resp is not None
+  def pairs_cte(pairs: list[RegisterUserRole]) -> CTE:
+    """
+    Requested pairs as `(idx, user_id, role_id)` rows. Sent as two int arrays, 
+    so statement has the same 2 parameters for any number of pairs
+    """    
+    rows = func.unnest(
+      literal([pair.user_id for pair in pairs], ARRAY(Integer)),
+      literal([pair.role_id for pair in pairs], ARRAY(Integer)),
+    ).table_valued("user_id", "role_id", with_ordinality="idx").render_derived()
 
-    await UsersRolesRepository.add(session, RegisterUserRole(user_id=user_id, role_id=resp.role_id))
+    return select(rows.c.idx, rows.c.user_id, rows.c.role_id).cte("pairs")
 
 
   @staticmethod
-  async def add_main_admin_roles(session: AsyncSession, user_id: int) -> OKResponce | None:
-    admin_role = AvailableRoles.ADMIN
+  def build_result(rows: Sequence[Row], outcome: Callable[[Row], BulkOutcome]) -> BulkUserRolesResult:
+    results = [UserRoleOutcome(user_id=row.user_id, role_id=row.role_id, outcome=outcome(row)) for row in rows]
 
-    resp = await RolesRepository.get_role(session, admin_role)
+    return BulkUserRolesResult(results=results, counts=Counter(result.outcome for result in results))
 
-    assert resp is not None
 
-    default_admin_role = RegisterUserRole(user_id=user_id, role_id=resp.role_id)
+  @staticmethod
+  async def grant_many(session: AsyncSession, pairs: list[RegisterUserRole]) -> BulkUserRolesResult:
+    """
+    Grants all *pairs* with one multi-row `INSERT ... SELECT ... ON CONFLICT DO NOTHING`.
+    Pairs with missing user or role are skipped instead of failing whole batch.
+
+    Outcomes are computed in the same statement: `EXISTS` in the outer select sees table 
+    as it was before insert, so it tells already granted pairs from invalid ones
+    """    
+    requested = UsersRolesRepository.pairs_cte(pairs)
+
+    valid_pairs = (
+      select(requested.c.user_id, requested.c.role_id)
+      .distinct()
+      .join(UsersORM, UsersORM.user_id == requested.c.user_id)
+      .join(RolesORM, RolesORM.role_id == requested.c.role_id)
+    )
+
+    inserted = (
+      pg_insert(UsersRolesORM)
+      .from_select(["user_id", "role_id"], valid_pairs)
+      .on_conflict_do_nothing(index_elements=[UsersRolesORM.user_id, UsersRolesORM.role_id])
+      .returning(UsersRolesORM.user_id, UsersRolesORM.role_id)
+      .cte("inserted")
+    )
+
+    existed = exists().where(
+      UsersRolesORM.user_id == requested.c.user_id, 
+      UsersRolesORM.role_id == requested.c.role_id
+    )
+
+    query = (
+      select(
+        requested.c.user_id, 
+        requested.c.role_id, 
+        inserted.c.user_id.is_not(None).label("granted"), 
+        existed.label("existed")
+      )
+      .outerjoin(
+        inserted, 
+        and_(inserted.c.user_id == requested.c.user_id, inserted.c.role_id == requested.c.role_id)
+      )
+      .order_by(requested.c.idx)
+    )
+
+    rows = (await session.execute(query)).all()
+
+    await session.commit()
+
+    def outcome(row: Row) -> BulkOutcome:
+      if row.granted:
+        return BulkOutcome.GRANTED
+      
+      return BulkOutcome.ALREADY_GRANTED if row.existed else BulkOutcome.INVALID
+
+    return UsersRolesRepository.build_result(rows, outcome)
 
-    result = await UsersRolesRepository.add(session, default_admin_role)
 
-    return result
\ No newline at end of file
+  @staticmethod
+  async def revoke_many(session: AsyncSession, pairs: list[RegisterUserRole]) -> BulkUserRolesResult:
+    """
+    Revokes all *pairs* with one `DELETE ... USING` requested pairs
+    """    
+    requested = UsersRolesRepository.pairs_cte(pairs)
+
+    deleted = (
+      delete(UsersRolesORM)
+      .where(UsersRolesORM.user_id == requested.c.user_id, UsersRolesORM.role_id == requested.c.role_id)
+      .returning(UsersRolesORM.user_id, UsersRolesORM.role_id)
+      .cte("deleted")
+    )
+
+    query = (
+      select(requested.c.user_id, requested.c.role_id, deleted.c.user_id.is_not(None).label("revoked"))
+      .outerjoin(
+        deleted, 
+        and_(deleted.c.user_id == requested.c.user_id, deleted.c.role_id == requested.c.role_id)
+      )
+      .order_by(requested.c.idx)
+    )
+
+    rows = (await session.execute(query)).all()
+
+    await session.commit()
+
+    return UsersRolesRepository.build_result(
+      rows, lambda row: BulkOutcome.REVOKED if row.revoked else BulkOutcome.NOT_GRANTED
+    )
@@ -1,12 +1,14 @@
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, Response, status
 
 from auth.dependencies import AdminDependency
 from db.connection import AsyncSessionDepends
 from roles.models import UserRole
-from users_roles.models import RegisterUserRole, OKResponce, UserRoles
+from users_roles.models import MAX_BULK_PAIRS, BulkUserRoles, BulkUserRolesResult, RegisterUserRole, OKResponce, UserRoles
 from users_roles.repository import UsersRolesRepository
-from utils.common_responses import authorization_header, token_responses
+from utils.common_responses import authorization_header, not_modified_responce, token_responses
+from utils.etag import check_etag
+from utils.pagination import Page, PageParamsDepends
 
 
 users_roles_router = APIRouter(prefix="/usersroles", tags=["users_roles"])
@@ -25,44 +27,42 @@ not_found_responce = {
 
 
 @users_roles_router.get('/', dependencies=[AdminDependency],
-  summary="Get all data from users_roles table (only for admin)",
+  summary="Get page of data from users_roles table (only for admin)",
   openapi_extra={
     **authorization_header
   },
   responses={
     "200":{
-      "model": list[UserRoles],
-      "description": "Get all data from users_roles table (only for admin)",
+      "model": Page[UserRoles],
+      "description": "Get page of data from users_roles table ordered by id (only for admin). "
+                     "Pass `next_cursor` as `cursor` to get next page, it is `null` on the last page",
       "content": {
         "application/json": {
-          "example": [
-            {
-              "id": 1,
-              "user_id": 1,
-              "role_id": 2,
-              "created_at": "2025-10-26 17:14:43.695421"
-            },
-            {
-              "id": 2,
-              "user_id": 2,
-              "role_id": 1,
-              "created_at": "2025-15-26 17:14:43.695421"
-            },
-          ]
+          "example": {
+            "items": [
+              {
+                "id": 1,
+                "user_id": 1,
+                "role_id": 2,
+                "created_at": "2025-10-26 17:14:43.695421"
+              },
+              {
+                "id": 2,
+                "user_id": 2,
+                "role_id": 1,
+                "created_at": "2025-15-26 17:14:43.695421"
+              },
+            ],
+            "next_cursor": "eyJhZnRlciI6IDJ9"
+          }
         }
       },
     },
     **token_responses,
-    **not_found_responce
   },
 )
-async def get_all(session: AsyncSessionDepends) -> list[UserRoles]:
-  result = await UsersRolesRepository.get_all(session)
-  
-  if result is None:
-    raise HTTPException(detail=f"users_roles not found", status_code=status.HTTP_404_NOT_FOUND)
-  
-  return result
+async def get_all(page: PageParamsDepends, session: AsyncSessionDepends) -> Page[UserRoles]:
+  return await UsersRolesRepository.get_all(session, page)
 
 
 @users_roles_router.get('/{user_id}', dependencies=[AdminDependency],
@@ -94,15 +94,23 @@ async def get_all(session: AsyncSessionDepends) -> list[UserRoles]:
       },
     },
     **token_responses,
-    **not_found_responce
+    **not_found_responce,
+    **not_modified_responce
   },
 )
-async def get_user_roles(user_id: int, session: AsyncSessionDepends) -> list[UserRole]:
+async def get_user_roles(
+  user_id: int, 
+  session: AsyncSessionDepends, 
+  request: Request, 
+  response: Response
+) -> list[UserRole]:
   result = await UsersRolesRepository.get_roles_by(session, user_id)
 
   if result is None:
     raise HTTPException(detail=f"user roles not found", status_code=status.HTTP_404_NOT_FOUND)
 
+  check_etag(request, response, result, "private, no-cache")
+
   return result
 
 
@@ -137,3 +145,62 @@ async def add_role_to_user(data: RegisterUserRole, session: AsyncSessionDepends)
   """
 
   return await UsersRolesRepository.add(session, data)
+
+
+bulk_responses = {
+  "200":{
+    "model": BulkUserRolesResult,
+    "description": "Returns outcome of every pair in request order and count of each outcome",
+    "content": {
+      "application/json": {
+        "example": {
+          "results": [
+            {"user_id": 1, "role_id": 1, "outcome": "granted"},
+            {"user_id": 2, "role_id": 1, "outcome": "already_granted"},
+            {"user_id": 999, "role_id": 1, "outcome": "invalid"}
+          ],
+          "counts": {"granted": 1, "already_granted": 1, "invalid": 1}
+        }
+      }
+    },
+  },
+  **token_responses,
+}
+
+
+@users_roles_router.post('/bulk/grant', dependencies=[AdminDependency],
+  summary=f"Grant roles to users, up to {MAX_BULK_PAIRS} pairs in one request (only for admin)",
+  openapi_extra={
+    **authorization_header
+  },
+  responses=bulk_responses,
+)
+async def grant_roles(data: BulkUserRoles, session: AsyncSessionDepends) -> BulkUserRolesResult:
+  """
+    Grants roles in one statement, existing pairs are left untouched:
+    
+    - **pairs**: list of {user_id: int, role_id: int}
+
+    Outcomes: `granted`, `already_granted`, `invalid` (user or role does not exist)
+  """
+
+  return await UsersRolesRepository.grant_many(session, data.pairs)
+
+
+@users_roles_router.post('/bulk/revoke', dependencies=[AdminDependency],
+  summary=f"Revoke roles from users, up to {MAX_BULK_PAIRS} pairs in one request (only for admin)",
+  openapi_extra={
+    **authorization_header
+  },
+  responses=bulk_responses,
+)
+async def revoke_roles(data: BulkUserRoles, session: AsyncSessionDepends) -> BulkUserRolesResult:
+  """
+    Revokes roles in one statement:
+    
+    - **pairs**: list of {user_id: int, role_id: int}
+
+    Outcomes: `revoked`, `not_granted`
+  """
+
+  return await UsersRolesRepository.revoke_many(session, data.pairs)
@@ -0,0 +1,85 @@
+from collections import OrderedDict
+import time
+from typing import Generic, Hashable, TypeVar
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+  """
+  Bounded in-process LRU cache where every entry also lives no longer than `ttl` seconds.
+  It is per worker, so other workers may see stale data up to `ttl`
+
+  :param maxsize: maximum number of entries, least recently used one is evicted first
+
+  :param ttl: entry lifetime in seconds. Entry can also be set with its own shorter `ttl`
+  """  
+  def __init__(self, maxsize: int, ttl: float) -> None:
+    self.maxsize = maxsize
+    self.ttl = ttl
+    self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.expirations = 0
+
+
+  def get(self, key: K) -> V | None:
+    item = self._data.get(key)
+
+    if item is None:
+      self.misses += 1
+      return None
+
+    expires_at, value = item
+
+    if expires_at <= time.monotonic():
+      del self._data[key]
+      self.expirations += 1
+      self.misses += 1
+      return None
+
+    self._data.move_to_end(key)
+    self.hits += 1
+
+    return value
+
+
+  def set(self, key: K, value: V, ttl: float | None = None) -> None:
+    if self.maxsize <= 0:
+      return
+
+    lifetime = self.ttl if ttl is None else min(ttl, self.ttl)
+
+    self._data[key] = (time.monotonic() + lifetime, value)
+    self._data.move_to_end(key)
+
+    while len(self._data) > self.maxsize:
+      self._data.popitem(last=False)
+      self.evictions += 1
+
+
+  def invalidate(self, *keys: K) -> None:
+    for key in keys:
+      self._data.pop(key, None)
+
+
+  def clear(self) -> None:
+    self._data.clear()
+
+
+  def stats(self) -> dict[str, int]:
+    return {
+      "size": len(self._data),
+      "hits": self.hits,
+      "misses": self.misses,
+      "evictions": self.evictions,
+      "expirations": self.expirations,
+    }
+
+
+  def __len__(self) -> int:
+    return len(self._data)
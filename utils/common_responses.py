@@ -28,4 +28,10 @@ token_responses = {
       }
     }
   },
-}
\ No newline at end of file
+}
+
+not_modified_responce = {
+  "304": {
+    "description": "Not modified, `If-None-Match` matches current `ETag`. Responce has no body",
+  },
+}
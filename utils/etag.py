@@ -0,0 +1,43 @@
+import hashlib
+from typing import Any
+
+from fastapi import HTTPException, Request, Response, status
+from pydantic_core import to_json
+
+
+def make_weak_etag(content: Any) -> str:
+  """
+  Weak ETag from hash of *content* JSON (models, lists of models or plain values)
+  """
+  digest = hashlib.blake2b(to_json(content), digest_size=8).hexdigest()
+
+  return f'W/"{digest}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+  """
+  Weak comparison of `If-None-Match` header (it can list several tags or be `*`) with *etag*
+  """
+  header = request.headers.get("if-none-match")
+
+  if header is None:
+    return False
+
+  tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+  return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def check_etag(request: Request, response: Response, content: Any, cache_control: str) -> None:
+  """
+  Sets `ETag` and `Cache-Control` of *content* to response.
+
+  :raises HTTPException: 304 without body when client already has the same *content*
+  """
+  etag = make_weak_etag(content)
+  headers = {"ETag": etag, "Cache-Control": cache_control}
+
+  if is_not_modified(request, etag):
+    raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+  response.headers.update(headers)
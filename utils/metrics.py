@@ -0,0 +1,133 @@
+from bisect import bisect_left
+from typing import Callable, Iterable, Protocol
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from a fast pool checkout to a slow export
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric(Protocol):
+
+  def collect(self) -> Iterable[str]:
+    ...
+
+
+def escape_label(value: str) -> str:
+  return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+  if not names:
+    return ""
+
+  return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def format_value(value: float) -> str:
+  if value == float("inf"):
+    return "+Inf"
+
+  return repr(float(value))
+
+
+class Counter:
+  """
+  Monotonically growing value, i.e. number of created connections
+  """
+  def __init__(self, name: str, documentation: str) -> None:
+    self.name = name
+    self.documentation = documentation
+    self.value = 0.0
+
+
+  def inc(self, amount: float = 1) -> None:
+    self.value += amount
+
+
+  def collect(self) -> Iterable[str]:
+    yield f"# HELP {self.name} {self.documentation}"
+    yield f"# TYPE {self.name} counter"
+    yield f"{self.name} {format_value(self.value)}"
+
+
+class Gauge:
+  """
+  Current value, read by *getter* only when metrics are collected, so it costs nothing between scrapes
+  """
+  def __init__(self, name: str, documentation: str, getter: Callable[[], float]) -> None:
+    self.name = name
+    self.documentation = documentation
+    self.getter = getter
+
+
+  def collect(self) -> Iterable[str]:
+    yield f"# HELP {self.name} {self.documentation}"
+    yield f"# TYPE {self.name} gauge"
+    yield f"{self.name} {format_value(self.getter())}"
+
+
+class Histogram:
+  """
+  :param labelnames: names of labels, `observe` takes their values in the same order
+
+  :param buckets: sorted upper bounds, `+Inf` bucket is added automatically
+
+  `observe` only increments one bucket, buckets are made cumulative in `collect`
+  """
+  def __init__(
+      self,
+      name: str,
+      documentation: str,
+      labelnames: tuple[str, ...] = (),
+      buckets: tuple[float, ...] = DEFAULT_BUCKETS
+  ) -> None:
+    self.name = name
+    self.documentation = documentation
+    self.labelnames = labelnames
+    self.buckets = buckets
+    # label values -> [per bucket counts..., +Inf count, sum]
+    self.series: dict[tuple[str, ...], list[float]] = {}
+
+
+  def observe(self, value: float, *labelvalues: str) -> None:
+    series = self.series.get(labelvalues)
+
+    if series is None:
+      series = self.series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+
+    series[bisect_left(self.buckets, value)] += 1
+    series[-1] += value
+
+
+  def count(self, *labelvalues: str) -> int:
+    series = self.series.get(labelvalues)
+
+    return 0 if series is None else int(sum(series[:-1]))
+
+
+  def collect(self) -> Iterable[str]:
+    yield f"# HELP {self.name} {self.documentation}"
+    yield f"# TYPE {self.name} histogram"
+
+    labelnames = self.labelnames + ("le",)
+
+    for labelvalues, series in self.series.items():
+      cumulative = 0
+
+      for bound, count in zip(self.buckets + (float("inf"),), series):
+        cumulative += count
+        labels = format_labels(labelnames, labelvalues + (format_value(bound),))
+        yield f"{self.name}_bucket{labels} {cumulative}"
+
+      labels = format_labels(self.labelnames, labelvalues)
+      yield f"{self.name}_sum{labels} {format_value(series[-1])}"
+      yield f"{self.name}_count{labels} {cumulative}"
+
+
+def render(metrics: Iterable[Metric]) -> str:
+  """
+  Prometheus text exposition format of all *metrics*
+  """
+  return "\n".join(line for metric in metrics for line in metric.collect()) + "\n"
@@ -0,0 +1,74 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.metrics import Histogram
+from utils.utils import pretty_print
+
+
+RequestLatency = Histogram(
+  "http_request_duration_seconds",
+  "Time to serve http request, by route template",
+  labelnames=("method", "route", "status")
+)
+
+
+class FirstRequestTimer:
+  """
+  Reports time from process start to the first served http request (cold start).
+  After that it only checks one flag per request
+  """  
+  def __init__(self, app: ASGIApp, started_at: float) -> None:
+    self.app = app
+    self.started_at = started_at
+    self.cold_start_ms: float | None = None
+
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+    await self.app(scope, receive, send)
+
+    if self.cold_start_ms is None and scope["type"] == "http":
+      self.cold_start_ms = (time.perf_counter() - self.started_at) * 1000
+      scope["app"].state.cold_start_ms = self.cold_start_ms
+
+      pretty_print("FIRST REQUEST SERVED ->", f"cold_start_ms={self.cold_start_ms:.1f}")
+
+
+class RequestTimer:
+  """
+  Observes duration of every http request in *histogram*.
+  Requests are labeled by route template (`/users/{user_id}`), not by path,
+  so number of series stays bounded. Requests that matched no route are labeled `unmatched`
+  """
+  def __init__(self, app: ASGIApp, histogram: Histogram) -> None:
+    self.app = app
+    self.histogram = histogram
+
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+    if scope["type"] != "http":
+      return await self.app(scope, receive, send)
+
+    status_code = 500
+
+    async def send_wrapper(message: Message) -> None:
+      nonlocal status_code
+
+      if message["type"] == "http.response.start":
+        status_code = message["status"]
+
+      await send(message)
+
+    start = time.perf_counter()
+
+    try:
+      await self.app(scope, receive, send_wrapper)
+    finally:
+      route = scope.get("route")
+
+      self.histogram.observe(
+        time.perf_counter() - start,
+        scope["method"],
+        getattr(route, "path", "unmatched"),
+        str(status_code)
+      )
@@ -0,0 +1,61 @@
+import base64
+import json
+from typing import Annotated, Callable, Generic, Sequence, TypeVar
+
+from fastapi import Depends, HTTPException, Query, status
+from pydantic import BaseModel
+
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class Page(BaseModel, Generic[T]):
+  items: list[T]
+  next_cursor: str | None = None
+
+
+class PageParams(BaseModel):
+  limit: int
+  after: int | None = None
+
+
+def encode_cursor(after: int) -> str:
+  return base64.urlsafe_b64encode(json.dumps({"after": after}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+  try:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    after = json.loads(base64.urlsafe_b64decode(padded))["after"]
+  except Exception:
+    raise HTTPException(detail="invalid cursor", status_code=status.HTTP_400_BAD_REQUEST)
+
+  if not isinstance(after, int):
+    raise HTTPException(detail="invalid cursor", status_code=status.HTTP_400_BAD_REQUEST)
+
+  return after
+
+
+def get_page_params(
+  limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+  cursor: Annotated[str | None, Query(description="`next_cursor` from previous page")] = None,
+) -> PageParams:
+  return PageParams(limit=limit, after=None if cursor is None else decode_cursor(cursor))
+
+
+def build_page(rows: Sequence[T], limit: int, key: Callable[[T], int]) -> Page[T]:
+  """
+  Repositories fetch `limit + 1` rows, extra row only tells that next page exists
+  """  
+  items = list(rows[:limit])
+
+  if len(rows) <= limit:
+    return Page(items=items)
+
+  return Page(items=items, next_cursor=encode_cursor(key(items[-1])))
+
+
+PageParamsDepends = Annotated[PageParams, Depends(get_page_params)]
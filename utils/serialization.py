@@ -0,0 +1,23 @@
+from functools import cache
+from typing import Any, Sequence, TypeVar
+
+from pydantic import BaseModel, TypeAdapter
+
+
+M = TypeVar("M", bound=BaseModel)
+
+
+@cache
+def list_adapter(model: type[M]) -> TypeAdapter[list[M]]:
+  """
+  Building `TypeAdapter` compiles validator, so it is done once per model
+  """
+  return TypeAdapter(list[model])
+
+
+def validate_rows(model: type[M], rows: Sequence[Any]) -> list[M]:
+  """
+  Validates plain result rows (i.e. `select(Model.a, Model.b)`) to *model* list in one call.
+  Rows are read by attribute names, no ORM objects and no per-row `model_validate` are involved
+  """
+  return list_adapter(model).validate_python(rows, from_attributes=True)